@@ -0,0 +1,343 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from landmarks import LIMB_NAMES, LIMB_ROOTS, SHOULDERS, HIPS
+
+
+# ================================================================
+# ------------------ ACUMULADORES EN LÍNEA -----------------------
+# ================================================================
+class RunningStats:
+    """Número de muestras, media, desviación, mínimo y máximo sin guardar las muestras (Welford).
+
+    Con ``shape`` se llevan varias series a la vez (p. ej. una por jugador y
+    extremidad): ``add`` recibe un valor por serie y una máscara opcional con
+    las series que tienen muestra. ``extend`` añade muchas muestras de golpe
+    a una sola serie.
+    """
+
+    def __init__(self, shape=()):
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        self._m2 = np.zeros(shape)
+
+    def add(self, x, mask=True):
+        x = np.asarray(x, dtype=np.float64)
+        mask = np.isfinite(x) & mask
+        self.count += mask
+        delta = np.where(mask, x - self.mean, 0.0)
+        self.mean += delta / np.maximum(self.count, 1)
+        self._m2 += np.where(mask, delta * (x - self.mean), 0.0)
+        x = np.where(mask, x, np.nan)
+        np.fmin(self.min, x, out=self.min)
+        np.fmax(self.max, x, out=self.max)
+
+    def extend(self, values, index=()):
+        """Añade ``values`` a la serie ``index`` combinando sus estadísticos (Chan et al.)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        count = self.count[index]
+        total = count + n
+        delta = mean - self.mean[index]
+        self.mean[index] += delta * n / total
+        self._m2[index] += m2 + delta * delta * count * n / total
+        self.count[index] = total
+        self.min[index] = min(self.min[index], values.min())
+        self.max[index] = max(self.max[index], values.max())
+
+    def summary(self, index=()):
+        count = int(self.count[index])
+        if count == 0:
+            return {"count": 0, "mean": None, "std": None, "min": None, "max": None}
+        return {"count": count, "mean": float(self.mean[index]),
+                "std": float(np.sqrt(self._m2[index] / count)),
+                "min": float(self.min[index]), "max": float(self.max[index])}
+
+
+class Histogram:
+    """Conteos en ``bins`` intervalos iguales de [lo, hi), más uno por debajo y otro por encima.
+
+    Sirve para sacar percentiles aproximados (``quantile``) con memoria fija.
+    Igual que ``RunningStats``, con ``shape`` lleva varias series a la vez.
+    """
+
+    def __init__(self, lo, hi, bins, shape=()):
+        self.edges = np.linspace(lo, hi, bins + 1)
+        self.counts = np.zeros(tuple(shape) + (bins + 2,), dtype=np.int64)
+        # primer intervalo de cada serie en counts aplanado
+        self._offsets = np.arange(0, self.counts.size, bins + 2).reshape(shape)
+
+    def add(self, x, mask=True):
+        """Un valor por serie; las dimensiones de ``x`` que sobren al final son más muestras."""
+        x = np.asarray(x, dtype=np.float64)
+        mask = np.isfinite(x) & mask
+        extra = x.ndim - self._offsets.ndim
+        flat = np.searchsorted(self.edges, x, side="right") + self._offsets.reshape(self._offsets.shape + (1,) * extra)
+        self.counts.reshape(-1)[:] += np.bincount(flat[mask], minlength=self.counts.size)
+
+    def quantile(self, q, index=()):
+        """Valor por debajo del que queda la fracción ``q`` de las muestras (None si no hay)."""
+        counts = self.counts[index]
+        total = counts.sum()
+        if total == 0:
+            return None
+        cum = np.cumsum(counts)
+        k = int(np.searchsorted(cum, q * total))
+        if k == 0:
+            return float(self.edges[0])
+        if k == len(counts) - 1:
+            return float(self.edges[-1])
+        frac = (q * total - cum[k - 1]) / counts[k]
+        return float(self.edges[k - 1] + frac * (self.edges[k] - self.edges[k - 1]))
+
+
+# ================================================================
+# ------------------ MÉTRICAS DE LA PARTIDA ----------------------
+# ================================================================
+MOVING_SPEED = 0.5      # torsos/s a partir de los que una extremidad se está moviendo
+MIN_MOVEMENT_S = 0.2    # los movimientos más cortos no cuentan para la suavidad
+REACH_GRID = (12, 9)    # celdas (ancho, alto) de la rejilla de alcance sobre la imagen
+TORSO_SMOOTHING = 0.1   # peso de cada frame en la media móvil del tamaño del torso
+
+
+class SessionAnalytics:
+    """Métricas de movimiento de una partida, calculadas en línea con memoria fija.
+
+    Se alimenta con los eventos del juego (``spawn``, ``catch``, ``miss``),
+    todos con el reloj de la simulación, y con los landmarks tal
+    como salen de cada inferencia nueva, sin filtrar ni extrapolar, en el
+    instante de captura de su frame (``observe``). Las distancias van en
+    longitudes de torso (de la mitad de los hombros a la mitad de las
+    caderas), así que no dependen de la resolución ni de lo lejos que esté
+    el paciente de la cámara.
+
+      - reacción: segundos desde que aparece un objeto hasta que se atrapa.
+      - atrapados y perdidos por tipo de objeto, por extremidad y por jugador.
+      - alcance de cada extremidad: distancia a su hombro o cadera, caja que
+        abarca en la imagen (coordenadas 0-1) y fracción de las celdas de
+        ``REACH_GRID`` por las que ha pasado.
+      - velocidad de cada extremidad en torsos/s.
+      - suavidad: log dimensionless jerk de cada movimiento (más cerca de 0,
+        más suave). Un movimiento dura mientras la velocidad supera
+        ``MOVING_SPEED`` sin cambiar de sentido.
+
+    ``limbs`` son los índices de landmark que se siguen y ``limb_types`` el
+    tipo de objeto que atrapa cada uno.
+    """
+
+    def __init__(self, type_names, limbs, limb_types, players=1, capacity=128, min_visibility=0.0):
+        self.type_names = list(type_names)
+        self.limbs = list(limbs)
+        self.limb_types = np.asarray(limb_types)
+        self.players = players
+        self.min_visibility = min_visibility
+        self._session_start = time.time()
+        P, L, T = players, len(self.limbs), len(self.type_names)
+        self._roots = [LIMB_ROOTS[i] for i in self.limbs]
+
+        # eventos
+        self._spawn_time = np.full(capacity, np.nan)
+        self.spawned = np.zeros(T, dtype=np.int64)
+        self.caught = np.zeros(T, dtype=np.int64)
+        self.missed = np.zeros(T, dtype=np.int64)
+        self.caught_by = np.zeros((P, L), dtype=np.int64)
+        self.reaction = RunningStats((T,))
+        self.reaction_hist = Histogram(0.0, 10.0, 100)
+
+        # movimiento
+        self.reach = RunningStats((P, L))
+        self.reach_min = np.full((P, L, 2), np.nan)     # esquinas de la caja de alcance
+        self.reach_max = np.full((P, L, 2), np.nan)
+        self.reach_cells = np.zeros((P, L, REACH_GRID[1], REACH_GRID[0]), dtype=bool)
+        self.speed = RunningStats((P, L))
+        self.speed_hist = Histogram(0.0, 10.0, 100, (P, L))
+        self.smoothness = RunningStats((P, L))
+
+        # estado del frame anterior y del movimiento en curso
+        self._torso = np.full(P, np.nan)
+        self._t = np.full((P, L), np.nan)
+        self._pos = np.full((P, L, 2), np.nan)
+        self._vel = np.full((P, L, 2), np.nan)
+        self._acc = np.full((P, L, 2), np.nan)
+        self._moving = np.zeros((P, L), dtype=bool)
+        self._move_time = np.zeros((P, L))
+        self._move_path = np.zeros((P, L))
+        self._move_jerk = np.zeros((P, L))
+
+    # ---------------- EVENTOS -----------------------------------
+    def spawn(self, t, slot, obj_type):
+        self._spawn_time[slot] = t
+        self.spawned[obj_type] += 1
+
+    def catch(self, t, slots, types, players, limbs):
+        """Objetos ``slots`` (de tipos ``types``) atrapados por la extremidad ``limbs`` de ``players``."""
+        if len(slots) == 0:
+            return
+        reaction = t - self._spawn_time[slots]
+        for k in np.unique(types):
+            self.reaction.extend(reaction[types == k], k)
+        self.reaction_hist.add(reaction)
+        np.add.at(self.caught, types, 1)
+        np.add.at(self.caught_by, (players, limbs), 1)
+        self._spawn_time[slots] = np.nan
+
+    def miss(self, slots, types):
+        if len(slots) == 0:
+            return
+        np.add.at(self.missed, types, 1)
+        self._spawn_time[slots] = np.nan
+
+    # ---------------- LANDMARKS ---------------------------------
+    def observe(self, t, data, w, h):
+        """Landmarks de un frame: ``data`` es el array (personas, 33, 4) de un ``PoseArray``.
+
+        Los puntos que no se ven pasan a NaN y el NaN se propaga: una
+        extremidad que no se ve no suma muestras y, al volver a verse, empieza
+        de cero su velocidad, aceleración y jerk.
+        """
+        xy = data[:, :, :2] * (w, h)
+        xy[data[:, :, 3] < self.min_visibility] = np.nan
+
+        torso = xy[:, SHOULDERS].mean(axis=1) - xy[:, HIPS].mean(axis=1)
+        torso = np.hypot(torso[:, 0], torso[:, 1])
+        seen = torso > 0
+        self._torso = np.where(seen & np.isnan(self._torso), torso,
+                               np.where(seen, self._torso + TORSO_SMOOTHING * (torso - self._torso), self._torso))
+        xy /= self._torso[:, None, None]
+        pos = xy[:, self.limbs]
+        vis = ~np.isnan(pos[..., 0])
+
+        # alcance
+        reach = pos - xy[:, self._roots]
+        self.reach.add(np.hypot(reach[..., 0], reach[..., 1]))
+        norm = np.where(vis[..., None], data[:, self.limbs, :2], np.nan)
+        np.fmin(self.reach_min, norm, out=self.reach_min)
+        np.fmax(self.reach_max, norm, out=self.reach_max)
+        p, l = np.nonzero(vis)
+        cell = (norm[p, l] * REACH_GRID).astype(int)
+        np.clip(cell, 0, (REACH_GRID[0] - 1, REACH_GRID[1] - 1), out=cell)
+        self.reach_cells[p, l, cell[:, 1], cell[:, 0]] = True
+
+        # velocidad, aceleración y jerk por diferencias con el frame anterior
+        dt = (t - self._t)[..., None]
+        vel = (pos - self._pos) / dt
+        speed = np.hypot(vel[..., 0], vel[..., 1])
+        self.speed.add(speed)
+        self.speed_hist.add(speed)
+        acc = (vel - self._vel) / dt
+        jerk = (acc - self._acc) / dt
+        jerk2 = (jerk * jerk).sum(axis=-1)
+        dt = dt[..., 0]
+
+        # movimientos: se acumulan mientras la extremidad va rápida (y hay jerk
+        # desde el principio, si no la integral se quedaría corta). Un cambio
+        # de sentido cierra el movimiento y empieza otro: con pocas
+        # inferencias por segundo la velocidad medida no llega a caer en la
+        # vuelta de un ir y venir
+        moving = (speed > MOVING_SPEED) & np.isfinite(jerk2)
+        reversed_ = (vel * self._vel).sum(axis=-1) < 0
+        going = moving & self._moving & ~reversed_
+        if going.any():
+            self._move_time += np.where(going, dt, 0.0)
+            self._move_path += np.where(going, speed * dt, 0.0)
+            self._move_jerk += np.where(going, jerk2 * dt, 0.0)
+        ended = self._moving & ~going
+        if ended.any():
+            T, path, jerk_sq = self._move_time, self._move_path, self._move_jerk
+            done = ended & vis & (T >= MIN_MOVEMENT_S) & (path > 0) & (jerk_sq > 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ldlj = -np.log(jerk_sq * T ** 5 / path ** 2)
+            self.smoothness.add(ldlj, done)
+            T[ended] = 0.0
+            path[ended] = 0.0
+            jerk_sq[ended] = 0.0
+        self._moving = moving
+
+        self._t = np.where(vis, t, np.nan)
+        self._pos, self._vel, self._acc = pos, vel, acc
+
+    # ---------------- RESULTADOS --------------------------------
+    def summary(self):
+        """Diccionario con todas las métricas, listo para guardar en JSON."""
+        resolved = self.caught + self.missed
+        objects = {}
+        for k, name in enumerate(self.type_names):
+            objects[name] = {
+                "spawned": int(self.spawned[k]), "caught": int(self.caught[k]), "missed": int(self.missed[k]),
+                "catch_rate": float(self.caught[k] / resolved[k]) if resolved[k] else None,
+                "reaction_s": self.reaction.summary(k),
+            }
+
+        players = []
+        for p in range(self.players):
+            limbs = {}
+            for l, idx in enumerate(self.limbs):
+                eligible = resolved[self.limb_types[l]]
+                box = np.concatenate([self.reach_min[p, l], self.reach_max[p, l]])
+                limbs[LIMB_NAMES[idx]] = {
+                    "caught": int(self.caught_by[p, l]),
+                    "catch_rate": float(self.caught_by[p, l] / eligible) if eligible else None,
+                    "reach_torsos": self.reach.summary((p, l)),
+                    "reach_box": box.tolist() if not np.isnan(box).any() else None,
+                    "reach_area": float(self.reach_cells[p, l].mean()),
+                    "speed_torsos_s": {**self.speed.summary((p, l)),
+                                       "p50": self.speed_hist.quantile(0.5, (p, l)),
+                                       "p90": self.speed_hist.quantile(0.9, (p, l))},
+                    "smoothness_ldlj": self.smoothness.summary((p, l)),
+                }
+            players.append({"caught": int(self.caught_by[p].sum()), "limbs": limbs})
+
+        total = resolved.sum()
+        return {
+            "catch_rate": float(self.caught.sum() / total) if total else None,
+            "reaction_s": {"count": int(self.reaction.count.sum()),
+                           "mean": self._mean_reaction(),
+                           "p50": self.reaction_hist.quantile(0.5),
+                           "p90": self.reaction_hist.quantile(0.9)},
+            "objects": objects,
+            "players": players,
+        }
+
+    def _mean_reaction(self):
+        count = self.reaction.count.sum()
+        return float((self.reaction.mean * self.reaction.count).sum() / count) if count else None
+
+    def summary_lines(self):
+        """Resumen corto para la pantalla de resultados."""
+        s = self.summary()
+        lines = []
+        rate = s["catch_rate"]
+        reaction = s["reaction_s"]
+        lines.append(f"Atrapados {rate:.0%}" if rate is not None else "Atrapados -")
+        if reaction["mean"] is not None:
+            lines[-1] += f"  Reaccion {reaction['mean']:.2f} s (p90 {reaction['p90']:.2f})"
+        if self.players == 1:
+            for name, limb in s["players"][0]["limbs"].items():
+                speed = limb["speed_torsos_s"]["mean"]
+                reach = limb["reach_torsos"]["max"]
+                smooth = limb["smoothness_ldlj"]["mean"]
+                lines.append(f"{name}: vel {_fmt(speed)}  alcance {_fmt(reach)}  suavidad {_fmt(smooth)}")
+        return lines
+
+    def save(self, directory, **session):
+        """Escribe el resumen (con ``session`` añadido) en un JSON y devuelve su ruta."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self._session_start))
+        path = os.path.join(directory, f"analytics_{stamp}.json")
+        with open(path, "w") as f:
+            json.dump({**session, **self.summary()}, f, indent=2)
+        return path
+
+
+def _fmt(value):
+    return f"{value:.1f}" if value is not None else "-"
@@ -1,79 +1,24 @@
+import os
 import sys
 import cv2
-import mediapipe as mp
-import numpy as np
-import random
 import time
+import numpy as np
 from config import config
-
-
-# ================================================================
-# ------------------- CONFIGURACIÓN MEDIAPIPE --------------------
-# ================================================================
-BaseOptions = mp.tasks.BaseOptions
-PoseLandmarker = mp.tasks.vision.PoseLandmarker
-PoseLandmarkerOptions = mp.tasks.vision.PoseLandmarkerOptions
-VisionRunningMode = mp.tasks.vision.RunningMode
-
-options = PoseLandmarkerOptions(
-    base_options=BaseOptions(model_asset_path=config.model_path),
-    running_mode=VisionRunningMode.VIDEO,
-    num_poses=1
-)
-
-
-# ================================================================
-# --------------------- OBJETOS QUE CAEN -------------------------
-# ================================================================
-class FallingObject:
-    def __init__(self, obj_type, x, speed, images):
-        self.obj_type = obj_type
-        self.x = x
-        self.y = 0
-        self.speed = speed
-        self.image = images[obj_type]
-
-        self.radius = int(max(self.image.shape[0], self.image.shape[1]) / 2) - 5
-
-    def move(self):
-        self.y += self.speed
-
-    def draw(self, frame):
-        img_h, img_w, _ = self.image.shape
-        x1 = int(self.x - img_w / 2)
-        y1 = int(self.y - img_h / 2)
-        x2 = x1 + img_w
-        y2 = y1 + img_h
-
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(frame.shape[1], x2)
-        y2 = min(frame.shape[0], y2)
-
-        img_x1 = 0
-        img_y1 = 0
-        if x1 == 0 and self.x - img_w / 2 < 0:
-            img_x1 = int(-(self.x - img_w / 2))
-        if y1 == 0 and self.y - img_h / 2 < 0:
-            img_y1 = int(-(self.y - img_h / 2))
-
-        img_to_draw = self.image[img_y1:img_y1+(y2-y1), img_x1:img_x1+(x2-x1)]
-
-        if img_to_draw.shape[0] > 0 and img_to_draw.shape[1] > 0:
-            roi = frame[y1:y2, x1:x2]
-
-            if img_to_draw.shape[2] == 4:
-                alpha_s = img_to_draw[:, :, 3] / 255.0
-                alpha_l = 1.0 - alpha_s
-                for c in range(0, 3):
-                    roi[:, :, c] = alpha_s * img_to_draw[:, :, c] + alpha_l * roi[:, :, c]
-            else:
-                frame[y1:y2, x1:x2] = img_to_draw
-
-
-def calculate_distance(p1, p2):
-    return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-
+from camera import (CameraStream, negotiate_capture, print_capture_report, load_cached_profile,
+                    save_cached_profile)
+from sprites import load_sprites
+from world import ObjectPool
+from tracking import create_landmark_filter
+from frames import FramePool
+from landmarks import PoseArray, LEFT_HAND, RIGHT_HAND, LEFT_FOOT, RIGHT_FOOT
+from profiler import Profiler
+from menus import MenuRenderer
+from display import WindowDisplay
+from startup import BackgroundTask, print_startup_report
+from simulation import FixedStepClock, SpawnTimeline
+from recorder import SessionRecorder, session_directory, EVENT_SPAWN, EVENT_CATCH, EVENT_MISS
+from analytics import SessionAnalytics
+from video import VideoRecorder
 
 
 # ================================================================
@@ -84,502 +29,665 @@ BTN_MEDIUM_REL = (0.12, 0.36, 0.88, 0.51)
 BTN_HARD_REL   = (0.12, 0.57, 0.88, 0.72)
 HOVER_TIME_REQUIRED = 1.5
 
+DIFFICULTY_MULTIPLIERS = {'FACIL': 0.6, 'MEDIO': 1.0, 'DIFICIL': 1.5}
+DURATIONS = {'30 SEG': 30, '60 SEG': 60, '90 SEG': 90}
+GAME_MODES = ("SOLO MANOS", "CUERPO ENTERO")
 
-def rect_from_rel(rel, w, h):
-    x1 = int(rel[0] * w)
-    y1 = int(rel[1] * h)
-    x2 = int(rel[2] * w)
-    y2 = int(rel[3] * h)
-    return (x1, y1, x2, y2)
-
-
-def draw_menu_overlay(frame, buttons, hovered_btn_name=None, hover_progress=0.0):
-    overlay = frame.copy()
-    h, w, _ = frame.shape
-    
-    alpha = 0.6
-
-    menu_x1 = int(0.08 * w)
-    menu_y1 = int(0.10 * h)
-    menu_x2 = int(0.92 * w)
-    menu_y2 = int(0.78 * h)
-    cv2.rectangle(overlay, (menu_x1, menu_y1), (menu_x2, menu_y2), (20, 20, 20), -1)
-    
-    cv2.putText(overlay, "Selecciona dificultad con la mano",
-                (int(0.12*w), int(0.13*h)),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255,255,255), 2)
-
-    for name, rect in buttons.items():
-        x1, y1, x2, y2 = rect
-
-        cv2.rectangle(overlay, (x1, y1), (x2, y2), (255,255,255), 2)
-
-        txt = name
-        (tw, th), _ = cv2.getTextSize(txt, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
-        tx = x1 + (x2 - x1)//2 - tw//2
-        ty = y1 + (y2 - y1)//2 + th//2
-        cv2.putText(overlay, txt, (tx, ty),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.0,
-                    (255,255,255), 2)
-
-        if hovered_btn_name == name:
-            bar_w = int((x2 - x1) * min(1.0, hover_progress))
-            cv2.rectangle(overlay, (x1, y2 - 10), (x1 + bar_w, y2 - 2), (255,255,255), -1)
-
-    return cv2.addWeighted(overlay, alpha, frame, 1.0 - alpha, 0)
+profiler = Profiler(config.profiling)
 
 
+MAX_SENT_TIMESTAMPS = 64   # frames en vuelo que se recuerdan para saber de cuándo es cada resultado
 
-def run_menu_with_hand_selection(landmarker, cap, frame_ms, current_ts):
-    hovered_button = None
-    hover_start = None
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            continue
-
-        frame = cv2.flip(frame, 1)
-        h, w, _ = frame.shape
-
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-        result = landmarker.detect_for_video(mp_image, int(current_ts))
-        current_ts += frame_ms
-
-        right_hand = left_hand = None
-
-        if result.pose_landmarks:
-            person_landmarks = result.pose_landmarks[0]
-            try:
-                right_w = person_landmarks[20]
-                left_w = person_landmarks[19]
-                right_hand = (int(right_w.x * w), int(right_w.y * h))
-                left_hand = (int(left_w.x * w), int(left_w.y * h))
-            except:
-                pass
-
-        buttons = {
-            'FACIL': rect_from_rel(BTN_EASY_REL, w, h),
-            'MEDIO': rect_from_rel(BTN_MEDIUM_REL, w, h),
-            'DIFICIL': rect_from_rel(BTN_HARD_REL, w, h)
-        }
-
-        hand_point = right_hand or left_hand
-        current_hover = None
-
-        if hand_point:
-            hx, hy = hand_point
-            cv2.circle(frame, (hx, hy), 10, (0,255,255), -1)
-
-            for name, rect in buttons.items():
-                x1, y1, x2, y2 = rect
-                if x1 <= hx <= x2 and y1 <= hy <= y2:
-                    current_hover = name
-                    break
+def landmark_timestamp(capture_time, last_ts):
+    """Timestamp en ms para el landmarker a partir del instante de captura, siempre creciente."""
+    return max(int(capture_time * 1000), last_ts + 1)
 
-        hover_progress = 0.0
-
-        if current_hover:
-            if hovered_button == current_hover:
-                if hover_start is None: hover_start = time.time()
-                elapsed = time.time() - hover_start
-                hover_progress = elapsed / HOVER_TIME_REQUIRED
-                if elapsed >= HOVER_TIME_REQUIRED:
-                    mul = {'FACIL':0.6,'MEDIO':1.0,'DIFICIL':1.5}[current_hover]
-                    return mul, current_ts
-            else:
-                hovered_button = current_hover
-                hover_start = time.time()
-        else:
-            hovered_button = None
-            hover_start = None
-
-        frame_menu = draw_menu_overlay(frame, buttons, hovered_button, hover_progress)
-        cv2.putText(frame_menu, "Coloca tu mano durante 1s para seleccionar",
-                    (int(0.1*w), int(0.85*h)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200,200,200), 2)
-
-        cv2.imshow("Falling Objects Pose Game", frame_menu)
-
-        if cv2.waitKey(1) & 0xFF == 27:
-            sys.exit()
+poses = PoseArray(config.num_poses, config.min_visibility)
+# extremidades que atrapan y el objeto que atrapa cada una
+LIMB_TARGETS = ((RIGHT_HAND, 'manzana'), (LEFT_HAND, 'pera'),
+                (LEFT_FOOT, 'balon'), (RIGHT_FOOT, 'balon'))
+frames = FramePool()    # el frame volteado sobre el que se dibuja, reutilizado entre frames
 
+DIFFICULTY_MENU = MenuRenderer(
+    "Selecciona dificultad con la mano",
+    "Coloca tu mano durante 1s para seleccionar",
+    {'FACIL': BTN_EASY_REL, 'MEDIO': BTN_MEDIUM_REL, 'DIFICIL': BTN_HARD_REL}
+)
 
 
 # ================================================================
 # ------------------ MENÚ DE DURACIÓN ----------------------------
 # ================================================================
-def draw_duration_menu_overlay(frame, buttons, hovered_btn_name=None, hover_progress=0.0):
-    overlay = frame.copy()
-    h, w, _ = frame.shape
-    alpha = 0.6
-
-    # fondo
-    cv2.rectangle(overlay, (int(0.08*w), int(0.10*h)),
-                  (int(0.92*w), int(0.78*h)), (20,20,20), -1)
-
-    cv2.putText(overlay, "Selecciona duracion del juego",
-                (int(0.12*w), int(0.13*h)),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255,255,255), 2)
-
-    for name, rect in buttons.items():
-        x1,y1,x2,y2 = rect
-        cv2.rectangle(overlay,(x1,y1),(x2,y2),(255,255,255),2)
-
-        (tw,th),_ = cv2.getTextSize(name, cv2.FONT_HERSHEY_SIMPLEX,1,2)
-        tx = x1+(x2-x1)//2 - tw//2
-        ty = y1+(y2-y1)//2 + th//2
-        cv2.putText(overlay,name,(tx,ty),cv2.FONT_HERSHEY_SIMPLEX,1,(255,255,255),2)
-
-        if hovered_btn_name==name:
-            bar_w = int((x2-x1)*min(1.0,hover_progress))
-            cv2.rectangle(overlay,(x1,y2-10),(x1+bar_w,y2-2),(255,255,255),-1)
-
-    return cv2.addWeighted(overlay,alpha,frame,1-alpha,0)
-
-
-
-def run_menu_for_duration(landmarker, cap, frame_ms, current_ts):
-    hovered = None
-    hover_start = None
-
-    while True:
-        ret, frame = cap.read()
-        if not ret: continue
-
-        frame=cv2.flip(frame,1)
-        h,w,_=frame.shape
-
-        mp_img=mp.Image(image_format=mp.ImageFormat.SRGB,data=frame)
-        result=landmarker.detect_for_video(mp_img,int(current_ts))
-        current_ts+=frame_ms
-
-        right_hand=left_hand=None
-        if result.pose_landmarks:
-            L=result.pose_landmarks[0]
-            try:
-                right_hand=(int(L[20].x*w),int(L[20].y*h))
-                left_hand =(int(L[19].x*w),int(L[19].y*h))
-            except: pass
-
-        btns={
-            '30 SEG':rect_from_rel(BTN_EASY_REL,w,h),
-            '60 SEG':rect_from_rel(BTN_MEDIUM_REL,w,h),
-            '90 SEG':rect_from_rel(BTN_HARD_REL,w,h)
-        }
+DURATION_MENU = MenuRenderer(
+    "Selecciona duracion del juego",
+    "Mantén la mano 1s para seleccionar",
+    {'30 SEG': BTN_EASY_REL, '60 SEG': BTN_MEDIUM_REL, '90 SEG': BTN_HARD_REL}
+)
 
-        hand=right_hand or left_hand
-        current=None
 
-        if hand:
-            hx,hy=hand
-            cv2.circle(frame,(hx,hy),10,(0,255,255),-1)
-            for name,r in btns.items():
-                if r[0]<=hx<=r[2] and r[1]<=hy<=r[3]:
-                    current=name
-                    break
+# ================================================================
+# ------------------ NUEVO MENÚ DE MODO ---------------------------
+# ================================================================
+MODE_MENU = MenuRenderer(
+    "Selecciona modo de juego",
+    "Mantén tu mano 1s para seleccionar",
+    {GAME_MODES[0]: BTN_EASY_REL, GAME_MODES[1]: BTN_MEDIUM_REL}
+)
 
-        progress=0
-        if current:
-            if hovered==current:
-                if hover_start is None: hover_start=time.time()
-                elapsed=time.time()-hover_start
-                progress=elapsed/HOVER_TIME_REQUIRED
-                if elapsed>=HOVER_TIME_REQUIRED:
-                    return {'30 SEG':30,'60 SEG':60,'90 SEG':90}[current], current_ts
-            else:
-                hovered=current
-                hover_start=time.time()
-        else:
-            hovered=None
-            hover_start=None
 
-        out=draw_duration_menu_overlay(frame,btns,hovered,progress)
-        cv2.putText(out,"Mantén la mano 1s para seleccionar",
-                    (int(0.1*w),int(0.85*h)),cv2.FONT_HERSHEY_SIMPLEX,0.7,(200,200,200),2)
-        cv2.imshow("Falling Objects Pose Game",out)
+# ================================================================
+# ------------------ RESULTADOS ----------------------------------
+# ================================================================
+RESULTS_BUTTONS = {'REPETIR': BTN_EASY_REL, 'CAMBIAR AJUSTES': BTN_MEDIUM_REL}
+RESULTS_HINT = "Mano 1s para elegir (ENTER cambia ajustes, ESC sale)"
 
-        if cv2.waitKey(1)&0xFF==27:
-            sys.exit()
 
+def results_title(scores):
+    if len(scores) == 1:
+        return f"Final Score: {scores[0]}"
+    return "Final Score: " + "  ".join(f"P{p+1} {s}" for p, s in enumerate(scores))
 
 
 # ================================================================
-# ------------------ NUEVO MENÚ DE MODO ---------------------------
+# ------------------ ESTADOS DEL JUEGO ---------------------------
 # ================================================================
-def draw_mode_menu_overlay(frame, buttons, hovered_btn_name=None, hover_progress=0.0):
-    overlay = frame.copy()
-    h, w, _ = frame.shape
-    alpha = 0.6
-
-    cv2.rectangle(overlay, (int(0.08*w), int(0.10*h)),
-                  (int(0.92*w), int(0.78*h)), (20,20,20), -1)
-
-    cv2.putText(overlay, "Selecciona modo de juego",
-                (int(0.12*w), int(0.13*h)),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255,255,255), 2)
+class GameState:
+    """Un estado del juego (un menú, la partida o los resultados).
 
-    for name, rect in buttons.items():
-        x1, y1, x2, y2 = rect
-        cv2.rectangle(overlay,(x1,y1),(x2,y2),(255,255,255),2)
+    ``run_states`` llama a ``step`` una vez por frame con el frame volteado,
+    su instante de captura, el último resultado del landmarker y el instante
+    de captura del frame del que salió ese resultado (None si no se sabe); si
+    no cambia, el resultado no es nuevo (repetido o extrapolado). Con un
+    ``FrameSkipper``, ``detection`` es ese resultado tal como salió del
+    modelo, sin filtrar ni extrapolar (si no, el mismo ``result``). ``step``
+    devuelve (siguiente estado, frame a mostrar o None): ``self`` para
+    seguir, otro estado para cambiar o None para terminar. Los estados
+    ``idle`` (menús y resultados) van en modo de bajo consumo.
+    """
 
-        (tw, th), _ = cv2.getTextSize(name, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)
-        tx = x1 + (x2-x1)//2 - tw//2
-        ty = y1 + (y2-y1)//2 + th//2
-        cv2.putText(overlay, name, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2)
+    idle = False
 
-        if hovered_btn_name == name:
-            bar_w = int((x2-x1)*min(1.0, hover_progress))
-            cv2.rectangle(overlay,(x1,y2-10),(x1+bar_w,y2-2),(255,255,255),-1)
+    def step(self, frame, capture_time, result, result_time=None, detection=None):
+        raise NotImplementedError
 
-    return cv2.addWeighted(overlay, alpha, frame, 1-alpha, 0)
+    def on_key(self, key):
+        """Estado tras pulsar ``key``; ESC termina."""
+        return None if key == 27 else self
 
 
+class HoverMenuState(GameState):
+    """Menú que se elige manteniendo una mano sobre un botón ``HOVER_TIME_REQUIRED`` segundos.
 
-def run_menu_for_mode(landmarker, cap, frame_ms, current_ts):
-    hovered = None
-    hover_start = None
+    ``values`` da el valor de cada botón y ``on_select(valor)`` el estado
+    siguiente. ``keys`` permite elegir también con el teclado (tecla -> valor).
+    """
 
-    while True:
-        ret, frame = cap.read()
-        if not ret: continue
+    idle = True
 
-        frame = cv2.flip(frame,1)
-        h,w,_ = frame.shape
-
-        mp_img = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-        result = landmarker.detect_for_video(mp_img, int(current_ts))
-        current_ts += frame_ms
+    def __init__(self, menu, values, on_select, keys=None):
+        self.menu = menu
+        self.values = values
+        self.on_select = on_select
+        self.keys = keys or {}
+        self.hovered = None
+        self.hover_start = None
 
-        right_hand = left_hand = None
-        if result.pose_landmarks:
-            L = result.pose_landmarks[0]
-            try:
-                right_hand=(int(L[20].x*w),int(L[20].y*h))
-                left_hand =(int(L[19].x*w),int(L[19].y*h))
-            except: pass
+    def step(self, frame, capture_time, result, result_time=None, detection=None):
+        h, w, _ = frame.shape
+        right_hand, left_hand = poses.update(result, w, h).points((RIGHT_HAND, LEFT_HAND))
 
-        buttons = {
-            "SOLO MANOS": rect_from_rel(BTN_EASY_REL, w, h),
-            "CUERPO ENTERO": rect_from_rel(BTN_MEDIUM_REL, w, h)
-        }
+        buttons = self.menu.layout(w, h)
 
         hand = right_hand or left_hand
         current = None
 
         if hand:
-            hx,hy = hand
-            cv2.circle(frame,(hx,hy),10,(0,255,255),-1)
+            hx, hy = hand
+            cv2.circle(frame, (hx, hy), 10, (0,255,255), -1)
             for name, r in buttons.items():
-                if r[0]<=hx<=r[2] and r[1]<=hy<=r[3]:
+                if r[0] <= hx <= r[2] and r[1] <= hy <= r[3]:
                     current = name
                     break
 
-        progress = 0
+        progress = 0.0
         if current:
-            if hovered == current:
-                if hover_start is None: hover_start = time.time()
-                elapsed = time.time() - hover_start
+            if self.hovered == current:
+                if self.hover_start is None: self.hover_start = capture_time
+                elapsed = capture_time - self.hover_start
                 progress = elapsed / HOVER_TIME_REQUIRED
                 if elapsed >= HOVER_TIME_REQUIRED:
-                    return current, current_ts
+                    return self.on_select(self.values[current]), None
             else:
-                hovered = current
-                hover_start = time.time()
+                self.hovered = current
+                self.hover_start = capture_time
         else:
-            hovered = None
-            hover_start = None
-
-        out = draw_mode_menu_overlay(frame, buttons, hovered, progress)
-        cv2.putText(out, "Mantén tu mano 1s para seleccionar",
-                    (int(0.1*w), int(0.85*h)),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200,200,200), 2)
-        cv2.imshow("Falling Objects Pose Game", out)
+            self.hovered = None
+            self.hover_start = None
+
+        out = self.render(frame, progress)
+        profiler.lap("menu")
+        return self, out
+
+    def render(self, frame, progress):
+        return self.menu.render(frame, self.hovered, progress)
+
+    def on_key(self, key):
+        if key in self.keys:
+            return self.on_select(self.keys[key])
+        return super().on_key(key)
+
+
+class ResultsState(HoverMenuState):
+    """Puntuación final sobre la cámara en directo, con botones para repetir o cambiar ajustes.
+
+    ``lines`` son líneas de texto que se muestran debajo de los botones (el
+    resumen de ``SessionAnalytics``).
+    """
+
+    def __init__(self, scores, on_select, lines=()):
+        super().__init__(MenuRenderer(results_title(scores), RESULTS_HINT, RESULTS_BUTTONS),
+                         {'REPETIR': "repeat", 'CAMBIAR AJUSTES': "menu"}, on_select, {13: "menu"})
+        self.scores = scores
+        self.lines = list(lines)
+
+    def render(self, frame, progress):
+        out = super().render(frame, progress)
+        h, w = out.shape[:2]
+        y = 0.58
+        if len(self.scores) > 1:
+            for p, score in enumerate(self.scores):
+                cv2.putText(out, f"P{p+1}: {score}", (int((0.14 + 0.19*p)*w), int(y*h)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, config.player_colors[p], 2)
+            y += 0.05
+        for line in self.lines:
+            cv2.putText(out, line, (int(0.14*w), int(y*h)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
+            y += 0.04
+        return out
+
+
+def menu_states(on_settings):
+    """Los tres menús seguidos; ``on_settings(ajustes)`` da el estado de después."""
+    def pick_mode(speed_multiplier, game_duration):
+        return HoverMenuState(MODE_MENU, {mode: mode for mode in GAME_MODES},
+                              lambda game_mode: on_settings((speed_multiplier, game_duration, game_mode)))
+
+    def pick_duration(speed_multiplier):
+        return HoverMenuState(DURATION_MENU, DURATIONS,
+                              lambda game_duration: pick_mode(speed_multiplier, game_duration))
+
+    return HoverMenuState(DIFFICULTY_MENU, DIFFICULTY_MULTIPLIERS, pick_duration)
+
+
+def run_states(landmarker, cap, display, timestamp, state):
+    """Bucle principal: captura, inferencia y un ``step`` del estado actual por frame.
+
+    Termina cuando un estado devuelve None (o se pulsa ESC) o se acaba la
+    fuente de vídeo, y devuelve el timestamp. Nada bloquea: la cámara y el
+    landmarker siguen al día en todos los estados. En los estados ``idle``
+    solo se procesa un frame cada ``1 / config.idle_fps`` segundos (los
+    demás se leen y se descartan, así que el bucle espera a la cámara en vez
+    de gastar CPU) y se infiere uno de cada ``config.idle_inference_interval``.
+    """
+    result = None
+    processed_at = None
+    since_inference = 0
+    sent = {}       # timestamp enviado al landmarker -> instante de captura del frame
+
+    while state is not None:
+        profiler.begin_frame()
+        ret, frame, capture_time = cap.read()
+        if not ret:
+            if not cap.isOpened(): break
+            continue
+        # un 10 % de margen para que el jitter de la cámara no haga saltar un frame de más
+        if state.idle and config.idle_fps and processed_at is not None \
+                and capture_time - processed_at < 0.9 / config.idle_fps:
+            continue
+        processed_at = capture_time
+        profiler.lap("capture")
+
+        frame = cv2.flip(frame, 1, dst=frames.get("frame", frame.shape))
+        profiler.lap("flip")
+
+        if not state.idle or result is None or since_inference + 1 >= config.idle_inference_interval:
+            timestamp = landmark_timestamp(capture_time, timestamp)
+            sent[timestamp] = capture_time
+            if len(sent) > MAX_SENT_TIMESTAMPS:
+                del sent[next(iter(sent))]
+            result = landmarker.detect(frame, timestamp)
+            since_inference = 0
+        else:
+            since_inference += 1
+        profiler.lap("inference")
 
-        if cv2.waitKey(1)&0xFF == 27:
-            sys.exit()
+        result_time = sent.get(getattr(landmarker, "result_timestamp_ms", None))
+        detection = getattr(landmarker, "detection", result)
+        state, out = state.step(frame, capture_time, result, result_time, detection)
+        if out is not None:
+            if config.profiler_overlay:
+                profiler.draw_overlay(out)
+            display.show(out)
+            key = display.poll_key()
+            if state is not None:
+                state = state.on_key(key)
+        profiler.lap("display")
+        profiler.end_frame()
 
+    return timestamp
 
 
 # ================================================================
 # -------------------------- JUEGO -------------------------------
 # ================================================================
-with PoseLandmarker.create_from_options(options) as landmarker:
-
-    cap = cv2.VideoCapture(0)
-    ret_init, frame_init = cap.read()
-    if not ret_init:
-        print("Error cámara.")
-        sys.exit()
-
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if fps == 0: fps = 30
-    frame_ms = int(1000/fps)
-    timestamp = 0
+ASSETS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def create_landmarker():
+    # mediapipe tarda en importarse: se carga aquí, en el hilo de carga, y no al abrir el juego
+    from inference import create_pose_estimator, InferenceFrontEnd, FrameSkipper
+
+    lead_ms = config.landmark_lead_ms if config.landmark_filter != "none" else None
+    return FrameSkipper(InferenceFrontEnd(create_pose_estimator(config), config.inference_input,
+                                          config.inference_width, config.padding),
+                        config.inference_interval, config.inference_interval_adaptive,
+                        config.frame_budget_ms, predictor=create_landmark_filter(config),
+                        lead_ms=lead_ms)
+
+
+def load_game_sprites():
+    images = {
+        'manzana': cv2.imread(os.path.join(ASSETS_DIR, 'manzanas.png'), cv2.IMREAD_UNCHANGED),
+        'pera': cv2.imread(os.path.join(ASSETS_DIR, 'pera.png'), cv2.IMREAD_UNCHANGED),
+        'balon': cv2.imread(os.path.join(ASSETS_DIR, 'balon.png'), cv2.IMREAD_UNCHANGED)
+    }
+
+    if any(img is None for img in images.values()):
+        raise FileNotFoundError("Error cargando imágenes.")
+
+    target_size = (100,100)
+    for key in images:
+        images[key] = cv2.resize(images[key], target_size)
+    return load_sprites(images)
+
+
+def load_landmarker():
+    """Crea el estimador y lo calienta. Devuelve (landmarker, timestamp, tiempos)."""
+    from inference import warm_up
+
+    t0 = time.perf_counter()
+    landmarker = create_landmarker()
+    t1 = time.perf_counter()
+    timestamp = warm_up(landmarker)
+    t2 = time.perf_counter()
+    return landmarker, timestamp, {"modelo": t1 - t0, "calentamiento": t2 - t1}
+
+
+def open_camera(source, display=None):
+    """Abre la cámara con el mejor perfil de ``config.camera_profiles`` e imprime lo negociado.
+
+    Si ``config.camera_cache_path`` tiene un perfil guardado para esta cámara
+    solo se comprueba que el driver lo acepta; si no, se prueban todos y se
+    guarda el elegido. Con ``display`` los frames de la prueba se muestran
+    como pantalla de carga, para que no haya una ventana negra mientras.
+    """
+    capture = cv2.VideoCapture(source)
+    chosen = None
+    if capture.isOpened() and config.camera_profiles:
+        cached = None
+        if config.camera_cache_path:
+            cached = load_cached_profile(config.camera_cache_path, source, config.camera_profiles)
+        if cached is not None:
+            profile, measured_fps = cached
+            chosen, results = negotiate_capture(capture, [profile], config.camera_min_resolution, 0)
+            if chosen is not None and chosen["meets_min"]:
+                chosen["measured_fps"] = measured_fps
+                print("Cámara: perfil guardado")
+            else:
+                chosen = None
+        if chosen is None:
+            start = time.time()
+            on_frame = None
+            if display is not None:
+                on_frame = lambda frame: show_loading(display, frame, "cámara", time.time() - start)
+            chosen, results = negotiate_capture(capture, config.camera_profiles, config.camera_min_resolution,
+                                                config.camera_probe_frames, on_frame=on_frame)
+            if chosen is not None and config.camera_cache_path:
+                save_cached_profile(config.camera_cache_path, source, chosen)
+        print_capture_report(chosen, results)
+    cap = CameraStream(source, config.camera_buffer_size, capture)
+    cap.profile = chosen
+    return cap.start()
 
-    # ---------------- MENÚ DIFICULTAD ----------------
-    speed_multiplier, timestamp = run_menu_with_hand_selection(landmarker, cap, frame_ms, timestamp)
 
-    # ---------------- MENÚ DURACIÓN -------------------
-    game_duration, timestamp = run_menu_for_duration(landmarker, cap, frame_ms, timestamp)
+# ================================================================
+# ------------------ PANTALLA DE CARGA ---------------------------
+# ================================================================
+def run_loading_screen(cap, display, tasks, clock=time.time):
+    """Muestra la cámara con un aviso de carga hasta que terminan ``tasks``.
+
+    Devuelve False si se acaba la fuente de vídeo antes.
+    """
+    start = clock()
+    while not all(task.done for task in tasks):
+        ret, frame, _ = cap.read()
+        if not ret:
+            if not cap.isOpened(): return False
+            continue
+        show_loading(display, frame, ", ".join(task.name for task in tasks if not task.done), clock() - start)
+    return True
 
-    # ---------------- MENÚ MODO NUEVO -----------------
-    game_mode, timestamp = run_menu_for_mode(landmarker, cap, frame_ms, timestamp)
-    use_full_body = (game_mode == "CUERPO ENTERO")
 
+def show_loading(display, frame, pending, elapsed):
+    """Muestra ``frame`` volteado con el aviso de carga y lo que falta (``pending``). ESC sale."""
+    frame = cv2.flip(frame, 1, dst=frames.get("frame", frame.shape))
+    h, w, _ = frame.shape
 
-    # ---------------- INICIALIZACIÓN ------------------
-    counter = 0
-    start_time = time.time()
-    objects = []
+    dots = "." * (1 + int(elapsed * 2) % 3)
+    cv2.rectangle(frame, (0, int(0.42*h)), (w, int(0.58*h)), (20, 20, 20), -1)
+    cv2.putText(frame, f"Cargando{dots}", (int(0.1*w), int(0.52*h)),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+    cv2.putText(frame, pending, (int(0.1*w), int(0.56*h)),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+    display.show(frame)
 
-    try:
-        images = {
-            'manzana': cv2.imread('manzanas.png', cv2.IMREAD_UNCHANGED),
-            'pera': cv2.imread('pera.png', cv2.IMREAD_UNCHANGED),
-            'balon': cv2.imread('balon.png', cv2.IMREAD_UNCHANGED)
-        }
-
-        if any(img is None for img in images.values()):
-            raise FileNotFoundError("Error cargando imágenes.")
-
-        target_size = (100,100)
-        for key in images:
-            images[key] = cv2.resize(images[key], target_size)
-    except:
+    if display.poll_key() == 27:
         sys.exit()
 
 
-
-    # ======================= LOOP DE JUEGO =======================
-    while cap.isOpened():
-
-        ret, frame = cap.read()
-        if not ret: break
-
-        frame = cv2.flip(frame,1)
+def make_timeline(settings, seed=None):
+    """Apariciones de objetos de una partida con estos ajustes (semilla aleatoria si es None)."""
+    speed_multiplier, game_duration, game_mode = settings
+    return SpawnTimeline.generate(seed, game_duration, speed_multiplier, game_mode == "CUERPO ENTERO",
+                                  config.spawn_rate, config.object_speed_range)
+
+
+class PlayState(GameState):
+    """Una partida completa.
+
+    El tiempo de la partida es el de captura de los frames: la física avanza
+    a paso fijo (``config.physics_hz``) y los objetos aparecen por tiempo, no
+    por frame, así que la dificultad no depende de los fps. Las apariciones
+    salen de ``timeline`` (un ``SpawnTimeline``); si no se da, se genera con
+    ``config.spawn_seed``. Con ``recorder`` se guardan los landmarks de cada
+    frame y los eventos de la partida, y con ``video`` (un ``VideoRecorder``)
+    lo que se ve en pantalla. En ``analytics`` (un ``SessionAnalytics``) se
+    van acumulando las métricas de movimiento.
+
+    Con ``config.num_poses`` mayor que 1 juegan varias personas a la vez,
+    numeradas de izquierda a derecha, cada una con su color y sus puntos.
+    Con ``players`` la partida usa su propio ``PoseArray`` con ese número de
+    personas en vez del global.
+
+    Al acabar el tiempo ``finished`` pasa a True y el estado siguiente es
+    ``on_finish(partida)`` (o None si no se da).
+    """
+
+    def __init__(self, settings, objects, timeline=None, recorder=None, on_finish=None, video=None,
+                 players=None):
+        self.settings = settings
+        self.objects = objects
+        self.recorder = recorder
+        self.video = video
+        self.on_finish = on_finish
+        self.finished = False
+        self.frame_size = None
+
+        speed_multiplier, self.game_duration, game_mode = settings
+        use_full_body = (game_mode == "CUERPO ENTERO")
+
+        # ---------------- INICIALIZACIÓN ------------------
+        self.poses = PoseArray(players, config.min_visibility) if players is not None else poses
+        self.players = self.poses.num_poses
+        self.detections = PoseArray(self.players, config.min_visibility)   # sin filtrar, para las métricas
+        self.scores = np.zeros(self.players, dtype=np.int64)
+        self.colors = config.player_colors if self.players > 1 else None
+        limbs = LIMB_TARGETS if use_full_body else LIMB_TARGETS[:2]
+        self.limb_indices = [idx for idx, _ in limbs]
+        self.limb_types = np.array([objects.type_index[t] for _, t in limbs], dtype=np.int8)
+        self.analytics = SessionAnalytics(objects.type_names, self.limb_indices, self.limb_types,
+                                          self.players, objects.capacity, config.min_visibility)
+        self.start_time = None
+        self._result_time = None
+        self.sim = FixedStepClock(config.physics_hz)
+        self.timeline = timeline if timeline is not None else make_timeline(settings, config.spawn_seed)
+        self.timeline.reset()
+        objects.clear()
+
+    def step(self, frame, capture_time, result, result_time=None, detection=None):
+        objects, recorder, sim, scores = self.objects, self.recorder, self.sim, self.scores
+        analytics, poses = self.analytics, self.poses
         h,w,_ = frame.shape
+        if self.start_time is None:
+            self.start_time = capture_time
+            self.frame_size = (w, h)
+            sim.start(capture_time)
+
+        elapsed = capture_time - self.start_time
+        poses.update(result, w, h)
+        fresh = result_time is not None and result_time != self._result_time
+        if fresh:
+            self._result_time = result_time
+        if recorder is not None:
+            recorder.record_frame(elapsed, poses.data, fresh)
+        # las métricas solo con inferencias nuevas, tal como salen del modelo
+        # y en su instante: los resultados repetidos, filtrados o
+        # extrapolados darían velocidades falsas
+        if fresh and result_time >= self.start_time:
+            detections = self.detections.update(detection if detection is not None else result, w, h)
+            analytics.observe(result_time - self.start_time, detections.data, w, h)
+
+        poses.draw(frame, colors=self.colors)
+        limb_points, limb_previous, limb_owner, limb_which = poses.visible_points(self.limb_indices)
+        profiler.lap("landmarks")
+
+
+        # --- Generar y mover objetos, a paso fijo ---
+        # las apariciones van intercaladas con los pasos: se miden aparte
+        # para que "spawn" y "move" sigan siendo etapas distintas
+        spawn_seconds = 0.0
+        for t in sim.steps(capture_time):
+            spawn_start = time.perf_counter()
+            for obj_type, x, speed in self.timeline.due(t, w):
+                slot = objects.spawn(obj_type, x, speed)
+                if slot < 0:
+                    continue
+                analytics.spawn(t, slot, objects.type[slot])
+                if recorder is not None:
+                    recorder.record_objects(t, EVENT_SPAWN, objects, (slot,))
+            spawn_seconds += time.perf_counter() - spawn_start
+            objects.move(sim.dt)
+        profiler.split("spawn", spawn_seconds)
+        missed = objects.cull(h)
+        analytics.miss(missed, objects.type[missed])
+        if recorder is not None:
+            recorder.record_objects(elapsed, EVENT_MISS, objects, missed)
+        profiler.lap("move")
+        objects.draw(frame)
+        profiler.lap("draw")
+
+        caught, catcher = objects.collide(limb_points, self.limb_types[limb_which], limb_previous)
+        catchers = limb_owner[catcher]
+        # con el mismo reloj que las apariciones: si la simulación se ha
+        # saltado pasos, el tiempo de captura ya no cuadra con el suyo
+        analytics.catch(sim.time, caught, objects.type[caught], catchers, limb_which[catcher])
+        if recorder is not None:
+            recorder.record_objects(elapsed, EVENT_CATCH, objects, caught, catchers)
+
+        objects.release(caught)
+        np.add.at(scores, catchers, 1)
+        profiler.lap("collision")
 
-        mp_img = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-        result = landmarker.detect_for_video(mp_img, timestamp)
-        timestamp += frame_ms
-
-        right_hand = left_hand = right_foot = left_foot = None
-
-        if result.pose_landmarks:
-            for person in result.pose_landmarks:
-                for idx, lm in enumerate(person):
-                    x,y = int(lm.x*w), int(lm.y*h)
-
-                    # dibujo original intacto
-                    if idx in [15,17,19,21]:
-                        cv2.circle(frame,(x,y),6,(0,255,0),-1)
-                    elif idx in [16,18,20,22]:
-                        cv2.circle(frame,(x,y),6,(0,0,255),-1)
-                    elif idx in [27,28,31,32]:
-                        cv2.circle(frame,(x,y),6,(255,0,0),-1)
-
-                try:
-                    right_hand = (int(person[20].x*w), int(person[20].y*h))
-                    left_hand  = (int(person[19].x*w), int(person[19].y*h))
-                    right_foot = (int(person[32].x*w), int(person[32].y*h))
-                    left_foot  = (int(person[31].x*w), int(person[31].y*h))
-                except:
-                    pass
-
-
-        # --- Generar objetos ---
-        if random.random() < 0.03:
-
-            if not use_full_body:
-                # solo manos → solo frutas
-                obj_type = random.choice(['manzana','pera'])
-            else:
-                # cuerpo entero → frutas + balones
-                r=random.random()
-                if r < 0.33: obj_type='manzana'
-                elif r < 0.66: obj_type='pera'
-                else: obj_type='balon'
-
-            x = random.randint(40, w-40)
-            speed = random.uniform(2,6)*speed_multiplier
-            objects.append(FallingObject(obj_type, x, speed, images))
-
-
-        # --- Actualizar objetos ---
-        new_objs=[]
-        for obj in objects:
-            obj.move()
-            obj.draw(frame)
-
-            if obj.y > h:
-                continue
+        # HUD
+        remaining = max(0, self.game_duration - elapsed)
 
-            caught=False
+        if self.players == 1:
+            cv2.putText(frame,f"Time: {remaining:.1f}  Points: {scores[0]}",
+                        (10,40),cv2.FONT_HERSHEY_SIMPLEX,1,(255,255,255),2)
+        else:
+            cv2.putText(frame,f"Time: {remaining:.1f}",
+                        (10,40),cv2.FONT_HERSHEY_SIMPLEX,1,(255,255,255),2)
+            for p in range(self.players):
+                cv2.putText(frame,f"P{p+1}: {scores[p]}",(10+int(p*w/self.players),80),
+                            cv2.FONT_HERSHEY_SIMPLEX,1,self.colors[p],2)
+        profiler.lap("hud")
 
-            if right_hand and obj.obj_type=='manzana':
-                if calculate_distance((obj.x,obj.y), right_hand) < obj.radius:
-                    caught=True
-                    counter+=1
+        if self.video is not None:
+            self.video.write(frame, elapsed)
+            profiler.lap("video")
 
-            elif left_hand and obj.obj_type=='pera':
-                if calculate_distance((obj.x,obj.y), left_hand) < obj.radius:
-                    caught=True
-                    counter+=1
+        # fin de juego
+        if remaining <= 0:
+            self.finished = True
+            return (self.on_finish(self) if self.on_finish is not None else None), frame
+        return self, frame
+
+    def close_recording(self):
+        """Cierra la grabación y el vídeo de la partida (si hay y siguen abiertos)."""
+        video = None
+        if self.video is not None:
+            self.video.close()
+            video = {"frames": self.video.frames, "fps": self.video.fps, "dropped": self.video.dropped,
+                     "repeated": self.video.repeated, "skipped": self.video.skipped, "size": self.video.size}
+            print(f"Vídeo guardado en {self.video.path} ({self.video.frames} frames a {self.video.fps:.0f} fps, "
+                  f"{self.video.repeated} repetidos, {self.video.dropped + self.video.skipped} descartados)")
+            self.video = None
+        if self.recorder is not None:
+            width, height = self.frame_size or (None, None)
+            self.recorder.close(width=width, height=height,
+                                score=int(self.scores.sum()), scores=self.scores.tolist(),
+                                finished=self.finished, analytics=self.analytics.summary(), video=video)
+            print(f"Sesión grabada en {self.recorder.directory}")
+            self.recorder = None
+
+
+def run_menus(landmarker, cap, display, timestamp):
+    """Los tres menús seguidos. Devuelve (ajustes, timestamp); ajustes es None si se sale o se acaba la fuente."""
+    chosen = []
+    timestamp = run_states(landmarker, cap, display, timestamp,
+                           menu_states(lambda settings: chosen.append(settings)))
+    return (chosen[0] if chosen else None), timestamp
 
-            elif use_full_body and obj.obj_type=='balon':
-                if left_foot and calculate_distance((obj.x,obj.y), left_foot) < obj.radius:
-                    caught=True
-                    counter+=1
-                elif right_foot and calculate_distance((obj.x,obj.y), right_foot) < obj.radius:
-                    caught=True
-                    counter+=1
 
-            if not caught:
-                new_objs.append(obj)
+# ================================================================
+# ------------------ FLUJO DEL JUEGO -----------------------------
+# ================================================================
+class GameFlow:
+    """Encadena los estados del juego normal: menús -> partida -> resultados -> ...
+
+    Cada partida nueva genera sus apariciones, abre su grabación si
+    ``config.record_sessions`` y su vídeo si ``config.record_video`` y, al terminar, guarda el perfil y pasa a la
+    pantalla de resultados, desde donde se repite con los mismos ajustes o
+    se vuelve a los menús. Si ``landmarker`` es un ``FrameSkipper``, el
+    error medio de sus predicciones durante la partida va al perfil.
+    """
+
+    def __init__(self, objects, fps, camera=None, startup=None, landmarker=None):
+        self.objects = objects
+        self.fps = fps
+        self.camera = camera
+        self.startup = startup
+        self.landmarker = landmarker
+        self.game = None
+
+    def menus(self):
+        return menu_states(self.start_game)
+
+    def start_game(self, settings):
+        speed_multiplier, game_duration, game_mode = settings
+        profiler.reset()
+        if hasattr(self.landmarker, "reset_prediction_error"):
+            self.landmarker.reset_prediction_error()
+        timeline = make_timeline(settings, config.spawn_seed)
+        directory = session_directory(config.recordings_dir)
+        recorder = video = None
+        if config.record_sessions:
+            recorder = SessionRecorder(directory, config.num_poses, self.fps, self.objects.type_names,
+                                       meta={"difficulty": speed_multiplier, "duration": game_duration,
+                                             "mode": game_mode, "seed": timeline.seed})
+            timeline.save(os.path.join(recorder.directory, "timeline.npz"))
+        if config.record_video:
+            video = VideoRecorder(os.path.join(directory, "video.mp4"), self.fps, config.video_scale,
+                                  config.video_queue_size, config.video_fourcc)
+        self.game = PlayState(settings, self.objects, timeline, recorder, on_finish=self.finish_game,
+                              video=video)
+        return self.game
+
+    def finish_game(self, game):
+        game.close_recording()
+        scores = game.scores.tolist()
+        speed_multiplier, game_duration, game_mode = game.settings
+        prediction_error = getattr(self.landmarker, "mean_prediction_error_px", None)
+        if prediction_error is not None:
+            print(f"Error medio de la predicción de manos y pies: {prediction_error:.1f} px")
+        profile_path = profiler.save(config.profile_dir, difficulty=speed_multiplier,
+                                     duration=game_duration, mode=game_mode, score=sum(scores), scores=scores,
+                                     seed=game.timeline.seed, startup=self.startup, camera=self.camera,
+                                     prediction_error_px=prediction_error)
+        if profile_path:
+            print(f"Perfil de la sesión guardado en {profile_path}")
+        if config.save_analytics:
+            analytics_path = game.analytics.save(config.analytics_dir, difficulty=speed_multiplier,
+                                                 duration=game_duration, mode=game_mode, scores=scores,
+                                                 seed=game.timeline.seed)
+            print(f"Métricas de la sesión guardadas en {analytics_path}")
+        return ResultsState(scores, lambda choice: self.start_game(game.settings) if choice == "repeat"
+                            else self.menus(), game.analytics.summary_lines())
+
+    def close(self):
+        if self.game is not None:
+            self.game.close_recording()
+
+
+def main(cap=None, display=None):
+    """Bucle completo del juego. Por defecto con la cámara ``config.camera_index`` y una ventana."""
+    # el modelo y los sprites se cargan mientras se abre la cámara y se muestra la pantalla de carga
+    t0 = time.perf_counter()
+    model_task = BackgroundTask("modelo", load_landmarker)
+    sprites_task = BackgroundTask("sprites", load_game_sprites)
+
+    if display is None:
+        display = WindowDisplay()
+    if cap is None:
+        cap = open_camera(config.camera_index, display)
+    ret_init, frame_init, _ = cap.read()
+    if not ret_init:
+        print("Error cámara.")
+        cap.release()
+        sys.exit()
+    camera_s = time.perf_counter() - t0
 
-        objects=new_objs
+    if not run_loading_screen(cap, display, (model_task, sprites_task)):
+        cap.release()
+        sys.exit()
 
-        # HUD
-        elapsed = time.time() - start_time
-        remaining = max(0, game_duration - elapsed)
+    try:
+        sprites = sprites_task.result()
+    except:
+        sys.exit()
+    landmarker, timestamp, model_times = model_task.result()
 
-        cv2.putText(frame,f"Time: {remaining:.1f}  Points: {counter}",
-                    (10,40),cv2.FONT_HERSHEY_SIMPLEX,1,(255,255,255),2)
+    startup = {"cámara": camera_s, "sprites": sprites_task.seconds, **model_times,
+               "listo": time.perf_counter() - t0}
+    print_startup_report(startup)
 
-        # fin de juego
-        if remaining <= 0:
-            frame[:] = 0
-            cv2.putText(frame,f"Final Score: {counter}",(int(w/3),int(h/2)),
-                        cv2.FONT_HERSHEY_SIMPLEX,1.5,(0,255,0),3)
-
-            cv2.putText(frame,"Press ENTER to restart or ESC to exit",
-                        (int(w/6),int(h/2+60)),
-                        cv2.FONT_HERSHEY_SIMPLEX,0.8,(255,255,255),2)
-
-            cv2.imshow("Falling Objects Pose Game", frame)
-
-            while True:
-                key=cv2.waitKey(1)&0xFF
-                if key==13:
-                    speed_multiplier,timestamp = run_menu_with_hand_selection(landmarker,cap,frame_ms,timestamp)
-                    game_duration,timestamp = run_menu_for_duration(landmarker,cap,frame_ms,timestamp)
-                    game_mode,timestamp = run_menu_for_mode(landmarker,cap,frame_ms,timestamp)
-                    use_full_body = (game_mode=="CUERPO ENTERO")
-                    counter=0
-                    objects=[]
-                    start_time=time.time()
-                    break
+    with landmarker:
 
-                elif key==27:
-                    cap.release()
-                    cv2.destroyAllWindows()
-                    sys.exit()
+        profile = getattr(cap, "profile", None)
+        camera = None
+        if profile is not None:
+            camera = {k: profile[k] for k in ("name", "negotiated", "measured_fps", "frame_size")}
+        fps = (profile or {}).get("measured_fps") or cap.get(cv2.CAP_PROP_FPS)
+        if fps == 0: fps = 30
 
-        else:
-            cv2.imshow("Falling Objects Pose Game", frame)
-            if cv2.waitKey(1)&0xFF == 27:
-                break
+        flow = GameFlow(ObjectPool(sprites, config.max_objects), fps, camera, startup, landmarker)
+        try:
+            run_states(landmarker, cap, display, timestamp, flow.menus())
+        finally:
+            flow.close()
+            cap.release()
+            display.close()
 
-    cap.release()
-    cv2.destroyAllWindows()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Benchmarks del juego sin cámara ni pantalla.
+
+    python benchmark.py                 # todos
+    python benchmark.py draw menus      # solo algunos
+    python benchmark.py --json bench.json
+
+Cubren el dibujado de objetos, las colisiones, los menús y sesiones
+completas reproducidas con landmarks sintéticos (no hace falta el modelo).
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+import app
+from config import config
+from replay import BlankFrameSource, LandmarkStreamPlayer, run_session
+from world import ObjectPool
+
+
+def _timeit(fn, repeat):
+    """Ejecuta ``fn`` ``repeat`` veces y devuelve media y percentiles en microsegundos."""
+    samples = np.empty(repeat, dtype=np.float64)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - t0
+    samples *= 1e6
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"mean_us": float(samples.mean()), "p50_us": float(p50),
+            "p95_us": float(p95), "p99_us": float(p99)}
+
+
+def _filled_pool(sprites, n, w, h, seed=0):
+    rng = random.Random(seed)
+    pool = ObjectPool(sprites, max(n, config.max_objects))
+    for _ in range(n):
+        slot = pool.spawn(rng.choice(pool.type_names), rng.randint(40, w - 40),
+                          rng.uniform(*config.object_speed_range))
+        pool.y[slot] = rng.uniform(0, h)
+    return pool
+
+
+def bench_draw(sprites, repeat=500, w=640, h=480):
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    results = {}
+    for n in (5, 20, 50):
+        pool = _filled_pool(sprites, n, w, h)
+        results[f"{n} objetos"] = _timeit(lambda: pool.draw(frame), repeat)
+    return results
+
+
+def bench_collision(sprites, repeat=2000, w=640, h=480):
+    """Manos y pies de 1 y 4 jugadores contra 5, 20 y 50 objetos."""
+    rng = np.random.default_rng(0)
+    results = {}
+    for players in (1, 4):
+        points = rng.uniform((0, 0), (w, h), (4 * players, 2)).astype(np.int32)
+        previous = points + rng.integers(-40, 40, points.shape)     # manos y pies en movimiento
+        for n in (5, 20, 50):
+            pool = _filled_pool(sprites, n, w, h)
+            types = np.tile([pool.type_index[t] for t in ('manzana', 'pera', 'balon', 'balon')], players)
+            results[f"{players}j {n} objetos"] = _timeit(lambda: pool.collide(points, types, previous), repeat)
+    return results
+
+
+def bench_menus(repeat=300):
+    results = {}
+    menus = {"dificultad": app.DIFFICULTY_MENU, "duracion": app.DURATION_MENU, "modo": app.MODE_MENU}
+    for w, h in ((640, 480), (1280, 720), (1920, 1080)):
+        frame = np.random.default_rng(0).integers(0, 255, (h, w, 3), dtype=np.uint8)
+        for name, menu in menus.items():
+            hovered = next(iter(menu.buttons_rel))
+            results[f"{name} {w}x{h}"] = _timeit(lambda: menu.render(frame, hovered, 0.5), repeat)
+    return results
+
+
+def synthetic_landmarks(seconds, fps=30, seed=0, menu_seconds=9, players=1):
+    """Landmarks de una persona que elige en los menús y luego mueve manos y pies.
+
+    Durante los primeros ``menu_seconds`` la mano derecha se queda sobre el
+    primer botón, lo que basta para pasar los tres menús. Con ``players`` > 1
+    devuelve (frames, personas, 33, 4) con cada persona en su franja de la
+    imagen; la que elige en los menús es la primera.
+    """
+    if players > 1:
+        lm = np.stack([synthetic_landmarks(seconds, fps, seed + p, menu_seconds)
+                       for p in range(players)], axis=1)
+        lm[..., 0] = (lm[..., 0] - 0.5) / players + (np.arange(players)[:, None] + 0.5) / players
+        lm[:int(menu_seconds * fps), 0, 20, 0] = 0.5
+        return lm
+
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    t = np.arange(n, dtype=np.float32) / fps
+    lm = np.full((n, 33, 4), 0.5, dtype=np.float32)
+    lm[:, :, 3] = 1.0
+    lm[:, :, :2] += rng.normal(0, 0.003, (n, 33, 2))
+
+    menus = int(menu_seconds * fps)
+    lm[:menus, 20, 0] = 0.5
+    lm[:menus, 20, 1] = 0.22
+
+    play = slice(menus, n)
+    for idx, fx, fy, y0 in ((20, 3.0, 2.0, 0.35), (19, 2.5, 1.7, 0.35),
+                            (32, 1.3, 0.9, 0.85), (31, 1.1, 1.2, 0.85)):
+        lm[play, idx, 0] = 0.5 + 0.4 * np.sin(t[play] * fx + idx)
+        lm[play, idx, 1] = y0 + 0.1 * np.cos(t[play] * fy)
+    return lm
+
+
+def bench_sessions(sprites, w=640, h=480, fps=30):
+    """Sesiones completas: una pasando por los menús, dos con ajustes fijos y una de 4 jugadores."""
+    full_body = (app.DIFFICULTY_MULTIPLIERS['DIFICIL'], 60, app.GAME_MODES[1])
+    cases = {
+        "menus + 30s": (None, 30 + 12, 9, 1),
+        "60s cuerpo entero": (full_body, 61, 0, 1),
+        "90s solo manos": ((app.DIFFICULTY_MULTIPLIERS['MEDIO'], 90, app.GAME_MODES[0]), 91, 0, 1),
+        "60s cuerpo entero 4j": (full_body, 61, 0, 4),
+    }
+    results = {}
+    for name, (settings, seconds, menu_seconds, players) in cases.items():
+        player = LandmarkStreamPlayer(synthetic_landmarks(seconds, fps, menu_seconds=menu_seconds,
+                                                          players=players), fps)
+        source = BlankFrameSource(len(player), w, h, fps)
+        objects = ObjectPool(sprites, config.max_objects)
+        results[name] = run_session(source, player, settings, seed=0, objects=objects, players=players)
+    return results
+
+
+BENCHMARKS = ("draw", "collision", "menus", "sessions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*",
+                        help=f"benchmarks a ejecutar: {', '.join(BENCHMARKS)} (por defecto todos)")
+    parser.add_argument("--json", help="guarda los resultados en este fichero")
+    args = parser.parse_args()
+    names = args.names or BENCHMARKS
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"benchmarks desconocidos: {', '.join(sorted(unknown))}")
+
+    sprites = app.load_game_sprites()
+    results = {}
+    for name in names:
+        if name == "draw":
+            results[name] = bench_draw(sprites)
+        elif name == "collision":
+            results[name] = bench_collision(sprites)
+        elif name == "menus":
+            results[name] = bench_menus()
+        elif name == "sessions":
+            results[name] = bench_sessions(sprites)
+
+    for name, cases in results.items():
+        print(f"== {name}")
+        for case, r in cases.items():
+            if "fps" in r:
+                frame = r["stages"].get("frame", {})
+                print(f"  {case:<22} {r['frames']:6d} frames  {r['fps']:8.1f} fps  "
+                      f"frame p50 {frame.get('p50_ms', 0):.2f} ms  p99 {frame.get('p99_ms', 0):.2f} ms")
+            else:
+                print(f"  {case:<22} media {r['mean_us']:8.1f} us  p50 {r['p50_us']:8.1f}  "
+                      f"p95 {r['p95_us']:8.1f}  p99 {r['p99_us']:8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+# ================================================================
+# ------------------ CAPTURA EN HILO SEPARADO --------------------
+# ================================================================
+class CameraStream:
+    """Lee la cámara en un hilo propio y entrega siempre el frame más reciente.
+
+    Los frames se guardan en un buffer circular pequeño junto con el instante
+    real de captura (``time.monotonic()``, en segundos). Al leer se descartan
+    los frames antiguos que no llegaron a consumirse y se contabilizan en
+    ``frames_dropped``. Con ``cap`` se usa una captura ya abierta (p. ej. la
+    configurada por ``negotiate_capture``) en vez de abrir ``source``.
+
+    Los arrays de los frames descartados o ya consumidos se reutilizan para
+    las siguientes capturas, así que el frame que devuelve ``read`` solo es
+    válido hasta la siguiente llamada a ``read``.
+    """
+
+    def __init__(self, source=0, buffer_size=2, cap=None):
+        self.source = source
+        self.cap = cap if cap is not None else cv2.VideoCapture(source)
+        self._buffer = deque(maxlen=max(1, buffer_size))
+        self._free = []             # arrays que se pueden volver a usar en cap.read
+        self._held = None           # frame entregado en el último read
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.profile = None         # perfil de captura negociado, si se usó uno
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._update, name="CameraStream", daemon=True)
+        self._thread.start()
+        return self
+
+    def _update(self):
+        while self._running:
+            with self._cond:
+                buf = self._free.pop() if self._free else None
+            ret, frame = self.cap.read(buf) if buf is not None else self.cap.read()
+            capture_time = time.monotonic()
+            if not ret:
+                if buf is not None:
+                    with self._cond:
+                        self._free.append(buf)
+                if not self.cap.isOpened():
+                    break
+                time.sleep(0.005)
+                continue
+
+            with self._cond:
+                if len(self._buffer) == self._buffer.maxlen:
+                    # el más antiguo se pierde sin haberse leído
+                    self.frames_dropped += 1
+                    self._free.append(self._buffer.popleft()[0])
+                self._buffer.append((frame, capture_time))
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """Devuelve ``(ret, frame, capture_time)`` con el frame más nuevo."""
+        with self._cond:
+            if not self._buffer:
+                self._cond.wait_for(lambda: self._buffer or not self._running, timeout)
+            if not self._buffer:
+                return False, None, None
+
+            frame, capture_time = self._buffer.pop()
+            self.frames_dropped += len(self._buffer)
+            self._free.extend(f for f, _ in self._buffer)
+            self._buffer.clear()
+            if self._held is not None:
+                self._free.append(self._held)
+            self._held = frame
+
+        return True, frame, capture_time
+
+    def isOpened(self):
+        return self.cap.isOpened() and (self._running or bool(self._buffer))
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.cap.release()
+
+
+# ================================================================
+# ------------------ PERFILES DE CAPTURA -------------------------
+# ================================================================
+def fourcc_name(code):
+    code = int(code)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\0")
+
+
+def apply_profile(cap, profile):
+    """Pide al driver el perfil y devuelve lo que dice haber aplicado.
+
+    El FOURCC va antes que el tamaño: algunos drivers solo ofrecen ciertos
+    tamaños con cada formato.
+    """
+    if profile.get("fourcc"):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*profile["fourcc"]))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile["width"])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile["height"])
+    cap.set(cv2.CAP_PROP_FPS, profile["fps"])
+    if profile.get("buffersize"):
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, profile["buffersize"])
+    return {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fourcc": fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "buffersize": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+
+def measure_capture(cap, frames, warmup=3, clock=time.monotonic, on_frame=None):
+    """Lee ``frames`` frames (tras ``warmup``) y devuelve (fps medidos, (ancho, alto)) o (0, None).
+
+    Cada frame leído se pasa a ``on_frame`` si se da.
+    """
+    size = None
+    for _ in range(warmup):
+        ret, frame = cap.read()
+        if not ret:
+            return 0.0, None
+        size = (frame.shape[1], frame.shape[0])
+        if on_frame is not None:
+            on_frame(frame)
+    t0 = clock()
+    for _ in range(frames):
+        ret, frame = cap.read()
+        if not ret:
+            return 0.0, None
+        size = (frame.shape[1], frame.shape[0])
+        if on_frame is not None:
+            on_frame(frame)
+    elapsed = clock() - t0
+    return (frames / elapsed if elapsed > 0 else 0.0), size
+
+
+def negotiate_capture(cap, profiles, min_resolution=(0, 0), probe_frames=15, clock=time.monotonic,
+                      on_frame=None):
+    """Prueba ``profiles`` en ``cap`` y lo deja configurado con el mejor.
+
+    Cada perfil se aplica, se lee lo que el driver dice haber aceptado y,
+    con ``probe_frames`` > 0, se miden los fps y el tamaño de los frames que
+    llegan de verdad. Se elige el de más fps medidos entre los que llegan a
+    ``min_resolution``; si ninguno llega, el de más fps. Con ``probe_frames``
+    = 0 no se mide y se elige el primero que el driver acepta con esa
+    resolución.
+
+    Devuelve (perfil elegido o None, lista de resultados por perfil). Cada
+    resultado es el perfil pedido más ``negotiated`` (lo leído del driver),
+    ``measured_fps``, ``frame_size`` y ``meets_min``. Los frames que se leen
+    al medir se pasan a ``on_frame`` (p. ej. para la pantalla de carga).
+    """
+    results = []
+    for profile in profiles:
+        negotiated = apply_profile(cap, profile)
+        if probe_frames > 0:
+            measured_fps, frame_size = measure_capture(cap, probe_frames, clock=clock, on_frame=on_frame)
+        else:
+            measured_fps, frame_size = None, (negotiated["width"], negotiated["height"])
+        meets_min = (frame_size is not None and frame_size[0] >= min_resolution[0]
+                     and frame_size[1] >= min_resolution[1])
+        results.append({**profile, "negotiated": negotiated, "measured_fps": measured_fps,
+                        "frame_size": frame_size, "meets_min": meets_min})
+        if probe_frames <= 0 and meets_min:
+            return results[-1], results
+
+    working = [r for r in results if r["frame_size"] is not None]
+    candidates = [r for r in working if r["meets_min"]] or working
+    if not candidates:
+        return None, results
+    # a igualdad de fps (p. ej. dos perfiles limitados a 30) gana el primero de la lista
+    best = max(candidates, key=lambda r: (round(r["measured_fps"] or 0), -results.index(r)))
+    if best is not results[-1]:
+        apply_profile(cap, best)
+    return best, results
+
+
+def print_capture_report(chosen, results):
+    """Imprime qué se probó y con qué perfil se queda la cámara."""
+    for r in results:
+        n = r["negotiated"]
+        measured = f"{r['measured_fps']:5.1f} fps" if r["measured_fps"] is not None else "   - fps"
+        size = "x".join(map(str, r["frame_size"])) if r["frame_size"] else "sin imagen"
+        print(f"  {r['name']:<14} driver {n['width']}x{n['height']} {n['fourcc'] or '?'} "
+              f"{n['fps']:.0f} fps buffer {n['buffersize']}  ->  {size} {measured}"
+              + ("" if r["meets_min"] else "  (no llega a la resolución mínima)"))
+    if chosen is None:
+        print("Cámara: ningún perfil da imagen, se usa la configuración por defecto del driver")
+        return
+    n = chosen["negotiated"]
+    measured = f", {chosen['measured_fps']:.1f} fps medidos" if chosen["measured_fps"] is not None else ""
+    print(f"Cámara: perfil {chosen['name']} -> {n['width']}x{n['height']} {n['fourcc'] or '?'} "
+          f"a {n['fps']:.0f} fps{measured}, buffer del driver {n['buffersize']}")
+
+
+def load_cached_profile(path, source, profiles):
+    """Perfil guardado para ``source`` con ``save_cached_profile``, o None.
+
+    Devuelve (perfil de ``profiles`` con ese nombre, fps medidos entonces).
+    """
+    try:
+        with open(path) as f:
+            cached = json.load(f).get(str(source))
+    except (OSError, ValueError):
+        return None
+    if not cached:
+        return None
+    profile = next((p for p in profiles if p["name"] == cached.get("name")), None)
+    return (profile, cached.get("measured_fps")) if profile is not None else None
+
+
+def save_cached_profile(path, source, chosen):
+    """Guarda el nombre y los fps medidos del perfil elegido para ``source``."""
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache[str(source)] = {"name": chosen["name"], "measured_fps": chosen["measured_fps"]}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(cache, f, indent=2)
+
+
+class VideoFileSource:
+    """Lee un vídeo grabado frame a frame, sin hilo ni descartes.
+
+    Tiene la misma interfaz que ``CameraStream`` pero el instante de cada
+    frame es su posición en el vídeo (``índice / fps``), de modo que una
+    reproducción da siempre el mismo resultado aunque vaya más rápida o más
+    lenta que el tiempo real. Cada frame se decodifica sobre el array del
+    anterior.
+    """
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.frame_index = 0
+        self.current_time = 0.0
+        self._ended = not self.cap.isOpened()
+        self._frame = None
+
+    def read(self, timeout=None):
+        ret, frame = self.cap.read(self._frame) if self._frame is not None else self.cap.read()
+        if not ret:
+            self._ended = True
+            return False, None, None
+        self._frame = frame
+        self.current_time = self.frame_index / self.fps
+        self.frame_index += 1
+        return True, frame, self.current_time
+
+    def isOpened(self):
+        return not self._ended
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
@@ -2,10 +2,99 @@ import os
 
 class Config:
     def __init__(self):
+        self.models_dir = os.path.join(os.path.dirname(__file__), 'models')
         self.model_path = os.path.join(os.path.dirname(__file__), 'models/pose_landmarker_full.task')
         self.padding = 100
+        self.num_poses = 1      # Jugadores a la vez (1-4); cada uno con sus puntos y su color
+        self.player_colors = [(0, 255, 0), (255, 128, 0), (0, 0, 255), (255, 0, 255)]  # BGR por jugador
+        self.min_visibility = 0.0   # Visibilidad mínima (0-1) para usar o dibujar un landmark
         self.game_time = 30     # Duración del juego en segundos
         self.circle_time = 1    # Duración de cada circulo azul antes de que desaparezca
         self.circle_time_radius = 15
+        self.max_objects = 128  # Capacidad del pool de objetos que caen
 
-config = Config()  # Instancia única
\ No newline at end of file
+        # Simulación a paso fijo sobre el tiempo real de captura, igual a cualquier fps
+        self.physics_hz = 60                    # Pasos de física por segundo
+        self.spawn_rate = 0.9                   # Objetos nuevos por segundo (antes 0.03 por frame a 30 fps)
+        self.object_speed_range = (60, 180)     # Velocidad de caída en px/s antes del multiplicador
+        self.spawn_seed = None                  # Semilla de las apariciones (None = distinta en cada partida)
+
+        # Bajo consumo en menús y resultados: se procesan idle_fps frames por segundo como
+        # mucho (0 = todos) y se infiere uno de cada idle_inference_interval
+        self.idle_fps = 15
+        self.idle_inference_interval = 2
+
+        # Inferencia: "sync" (VIDEO, espera cada resultado) o "async" (LIVE_STREAM con detect_async)
+        self.inference_mode = "sync"
+        self.async_max_queue_depth = 2  # Frames en vuelo como máximo en modo async
+
+        # Imagen de entrada al modelo: "full" (frame completo), "downscale" (reducido a
+        # inference_width) o "crop" (recorte alrededor de la pose anterior ampliado con padding)
+        self.inference_input = "full"
+        self.inference_width = 640
+
+        # Inferencia a saltos: se infiere cada inference_interval frames y entre medias se
+        # predicen manos y pies. En modo adaptativo el intervalo se ajusta a frame_budget_ms
+        self.inference_interval = 1
+        self.inference_interval_adaptive = False
+        self.frame_budget_ms = 33.0
+
+        # Filtro de manos y pies: "none" (sin filtrar), "one_euro" o "kalman". Con filtro, las
+        # posiciones se suavizan y se adelantan landmark_lead_ms más lo que tarda la inferencia
+        self.landmark_filter = "none"
+        self.landmark_lead_ms = 16.0
+        self.one_euro_min_cutoff = 1.5      # Hz
+        self.one_euro_beta = 5.0
+        self.kalman_process_noise = 10.0
+        self.kalman_measurement_noise = 0.005
+
+        # Selección automática del modelo según el tiempo de inferencia medido
+        self.adaptive_model = True
+        self.model_tiers = ['lite', 'full', 'heavy']    # De más rápido a más preciso
+        self.inference_budget_ms = 25.0                 # Tiempo máximo de inferencia por frame
+        self.adaptive_window = 30                       # Inferencias usadas para la media
+        self.adaptive_upgrade_ratio = 0.5               # Se sube de modelo si la media baja de budget * ratio
+
+        # Perfilado por etapas (percentiles en pantalla y JSON por sesión en profile_dir)
+        self.profiling = True
+        self.profiler_overlay = False
+        self.profile_dir = os.path.join(os.path.dirname(__file__), 'profiles')
+
+        # Grabación de cada partida (landmarks + eventos) para valorar la evolución motora
+        self.record_sessions = False
+        self.recordings_dir = os.path.join(os.path.dirname(__file__), 'recordings')
+
+        # Vídeo de cada partida (lo que se ve en pantalla), codificado en un hilo aparte
+        self.record_video = False
+        self.video_scale = 1.0          # Tamaño del vídeo respecto al frame (0.5 = mitad de ancho y alto)
+        self.video_queue_size = 8       # Frames esperando al codificador; si no cabe uno más se descarta
+        self.video_fourcc = 'mp4v'
+
+        # Métricas de movimiento de cada partida (reacción, alcance, velocidad, suavidad)
+        self.save_analytics = True
+        self.analytics_dir = os.path.join(os.path.dirname(__file__), 'analytics')
+
+        # Captura de cámara
+        self.camera_index = 0
+        self.camera_buffer_size = 2     # Frames guardados en el buffer circular (se entrega siempre el último)
+
+        # Perfiles de captura que se prueban al arrancar. Se elige el que da más fps de
+        # verdad entre los que llegan a camera_min_resolution; con camera_probe_frames = 0
+        # no se mide y se usa el primero que el driver acepta con esa resolución
+        self.camera_profiles = [
+            {"name": "720p MJPG 60", "width": 1280, "height": 720, "fourcc": "MJPG", "fps": 60, "buffersize": 1},
+            {"name": "720p MJPG 30", "width": 1280, "height": 720, "fourcc": "MJPG", "fps": 30, "buffersize": 1},
+            {"name": "480p MJPG 60", "width": 640, "height": 480, "fourcc": "MJPG", "fps": 60, "buffersize": 1},
+            {"name": "480p MJPG 30", "width": 640, "height": 480, "fourcc": "MJPG", "fps": 30, "buffersize": 1},
+            {"name": "480p YUYV 30", "width": 640, "height": 480, "fourcc": "YUYV", "fps": 30, "buffersize": 1},
+        ]
+        self.camera_min_resolution = (640, 480)
+        self.camera_probe_frames = 15   # Frames medidos por perfil para saber sus fps reales
+        # Perfil elegido por cada cámara: en los arranques siguientes solo se comprueba que el
+        # driver lo sigue aceptando, sin medir (None para negociar siempre)
+        self.camera_cache_path = os.path.join(os.path.dirname(__file__), 'camera_cache.json')
+
+    def model_path_for(self, tier):
+        return os.path.join(self.models_dir, f'pose_landmarker_{tier}.task')
+
+config = Config()  # Instancia única
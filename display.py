@@ -0,0 +1,46 @@
+import cv2
+
+
+# ================================================================
+# ------------------ SALIDA DE VÍDEO -----------------------------
+# ================================================================
+WINDOW_TITLE = "Falling Objects Pose Game"
+
+
+class WindowDisplay:
+    """Muestra los frames en una ventana de OpenCV y lee el teclado."""
+
+    def __init__(self, title=WINDOW_TITLE):
+        self.title = title
+
+    def show(self, frame):
+        cv2.imshow(self.title, frame)
+
+    def poll_key(self, delay_ms=1):
+        return cv2.waitKey(delay_ms) & 0xFF
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+class NullDisplay:
+    """Descarta los frames; sirve para ejecutar el juego sin pantalla.
+
+    ``keys`` es una lista opcional de teclas que se irán devolviendo en orden
+    en ``poll_key``; cuando se acaba se devuelve 255 (ninguna tecla).
+    """
+
+    def __init__(self, keys=None):
+        self.keys = list(keys or [])
+        self.frames_shown = 0
+        self.last_frame = None
+
+    def show(self, frame):
+        self.frames_shown += 1
+        self.last_frame = frame
+
+    def poll_key(self, delay_ms=1):
+        return self.keys.pop(0) if self.keys else 255
+
+    def close(self):
+        pass
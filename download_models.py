@@ -1,33 +1,292 @@
-import requests
+"""Descarga los modelos de MediaPipe a ``models/``.
+
+    python download_models.py                         # los tres modelos desde Google
+    python download_models.py --models lite full
+    python download_models.py --mirror /media/usb/models
+    python download_models.py --mirror file:///srv/models --workers 3
+    python download_models.py --mirror http://servidor-local/models
+    python download_models.py --write-manifest        # fija tamaño y SHA-256 de lo descargado
+    python download_models.py --allow-unverified      # instala aunque el manifiesto no tenga SHA-256
+
+Las descargas van en paralelo y se guardan en ``<nombre>.part``. Si se cortan, la
+siguiente ejecución sigue donde se quedó (cabeceras HTTP Range e If-Range,
+con el ETag o Last-Modified guardado en ``<nombre>.part.validator``). Un fichero
+solo se renombra a su nombre final cuando está completo y coincide con el
+tamaño y SHA-256 del manifiesto. Un modelo sin SHA-256 en el manifiesto no se
+instala salvo con ``--allow-unverified`` o ``--write-manifest`` (que lo fija a
+partir de esta descarga). El mirror también se puede indicar con la variable
+de entorno MODELS_MIRROR.
+"""
+import argparse
+import hashlib
+import json
 import os
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
 import tqdm
 
-url = {
-    "pose_landmarker_lite.task": "https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_lite/float16/latest/pose_landmarker_lite.task",
-    "pose_landmarker_full.task": "https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_full/float16/latest/pose_landmarker_full.task",
-    "pose_landmarker_heavy.task": "https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_heavy/float16/latest/pose_landmarker_heavy.task"
-}
-
-for key, value in url.items():
-    print(f"Descargando {key} desde {value}")
-    # Crear el directorio de destino si no existe
-    os.makedirs(os.path.join(os.path.dirname(__file__), 'models'), exist_ok=True)
-    # Definir la ruta de destino
-    archivo_destino = os.path.join(os.path.join(os.path.dirname(__file__), 'models'), key)
-
-    if os.path.exists(archivo_destino):
-        print(f"El archivo {archivo_destino} ya existe. Omitiendo descarga.")
-        continue
-
-    # Descargar el archivo
-    response = requests.get(value, stream=True)
-    if response.status_code == 200:
-        with open(archivo_destino, 'wb') as f:
-            total_size = int(response.headers.get('content-length', 0))
-            progress_bar = tqdm.tqdm(total=total_size, unit='iB', unit_scale=True)
-            for chunk in response.iter_content(chunk_size=8192):
-                progress_bar.update(len(chunk))
+from config import config
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models_manifest.json')
+CHUNK_SIZE = 1 << 16
+RETRIES = 5
+
+
+class DownloadError(Exception):
+    pass
+
+
+def load_manifest(path=MANIFEST_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def source_for(name, entry, mirror=None):
+    """URL o ruta local de donde sale ``name``: el mirror si se da, si no la URL oficial."""
+    if not mirror:
+        return entry["url"]
+    if mirror.startswith("file://"):
+        mirror = urllib.request.url2pathname(urllib.parse.urlparse(mirror).path)
+    if "://" in mirror:
+        return mirror.rstrip("/") + "/" + name
+    return os.path.join(mirror, name)
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def pinned(entry):
+    """True si el manifiesto fija el SHA-256 del modelo."""
+    return bool(entry.get("sha256"))
+
+
+def verify(path, entry):
+    """Error si el tamaño o el SHA-256 de ``path`` no son los del manifiesto (si los tiene)."""
+    size = os.path.getsize(path)
+    if entry.get("size") is not None and size != entry["size"]:
+        raise DownloadError(f"tamaño {size} en vez de {entry['size']}")
+    if entry.get("sha256"):
+        digest = file_digest(path)
+        if digest != entry["sha256"]:
+            raise DownloadError(f"SHA-256 {digest} en vez de {entry['sha256']}")
+
+
+# ================================================================
+# ------------------ DESCARGA DE UN FICHERO ----------------------
+# ================================================================
+def _validator_path(part):
+    return part + ".validator"
+
+
+def _discard(part):
+    """Borra un ``.part`` que no vale y su validador."""
+    for path in (part, _validator_path(part)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _read_validator(part):
+    try:
+        with open(_validator_path(part)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_validator(part, headers):
+    """Guarda el ETag (o si no hay, el Last-Modified) con el que se empezó ``part``.
+
+    Un ETag débil (``W/...``) no vale para If-Range.
+    """
+    etag = headers.get("etag")
+    validator = etag if etag and not etag.startswith("W/") else headers.get("last-modified")
+    if validator:
+        with open(_validator_path(part), "w") as f:
+            f.write(validator)
+    elif os.path.exists(_validator_path(part)):
+        os.remove(_validator_path(part))
+
+
+def _range_total(headers):
+    """Tamaño total de un ``Content-Range: bytes */total`` (o ``a-b/total``), o None."""
+    total = headers.get("content-range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def _fetch_http(url, part, progress):
+    """Completa ``part`` desde ``url``, pidiendo solo lo que falta.
+
+    Solo se reanuda si se guardó el ETag o Last-Modified de la primera
+    respuesta: se envía en ``If-Range`` y, si el fichero del servidor ha
+    cambiado, este responde con el fichero entero en vez de con el trozo.
+    """
+    have = os.path.getsize(part) if os.path.exists(part) else 0
+    validator = _read_validator(part) if have else None
+    if have and validator is None:
+        have = 0        # sin validador no se sabe si el trozo es del mismo fichero
+    headers = {"Range": f"bytes={have}-", "If-Range": validator} if have else {}
+    with requests.get(url, headers=headers, stream=True, timeout=30) as response:
+        if response.status_code == 416:
+            if _range_total(response.headers) == have:
+                return      # ya estaba completo
+            # el .part no cuadra con el fichero del servidor: se descarta y se empieza de nuevo
+            _discard(part)
+            return _fetch_http(url, part, progress)
+        response.raise_for_status()
+        if have and response.status_code != 206:
+            have = 0    # el servidor no admite Range o el fichero ha cambiado: se empieza de nuevo
+        if not have:
+            _write_validator(part, response.headers)
+        total = response.headers.get("content-length")
+        progress.reset(total=have + int(total) if total else None)
+        progress.update(have)
+        with open(part, "ab" if have else "wb") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
                 f.write(chunk)
-        print("\nDescarga completada.")
-    else:
-        print(f"\nError al descargar: {response.status_code}")
\ No newline at end of file
+                progress.update(len(chunk))
+            f.flush()
+            os.fsync(f.fileno())
+    if total and os.path.getsize(part) != have + int(total):
+        raise requests.ConnectionError("la conexión se cortó antes de terminar")
+
+
+def _fetch_local(path, part, progress):
+    """Copia ``path`` a ``part`` continuando desde lo que ya haya."""
+    have = os.path.getsize(part) if os.path.exists(part) else 0
+    total = os.path.getsize(path)
+    if have > total:
+        have = 0
+    progress.reset(total=total)
+    progress.update(have)
+    with open(path, "rb") as src, open(part, "ab" if have else "wb") as dst:
+        src.seek(have)
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            dst.write(chunk)
+            progress.update(len(chunk))
+        dst.flush()
+        os.fsync(dst.fileno())
+
+
+def _retryable(error):
+    """Los cortes de red y los errores 5xx se reintentan; un 404 o un fichero que falta, no."""
+    if isinstance(error, FileNotFoundError):
+        return False
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return True
+
+
+def download(name, entry, dest_dir, mirror=None, position=0, allow_unverified=False):
+    """Descarga (o reanuda) un modelo y lo deja en ``dest_dir`` ya verificado.
+
+    Si el manifiesto no tiene su SHA-256 solo se instala con
+    ``allow_unverified``. Devuelve "ok" si ya estaba y era correcto o
+    "descargado".
+    """
+    if not pinned(entry) and not allow_unverified:
+        raise DownloadError("el manifiesto no tiene su SHA-256")
+    dest = os.path.join(dest_dir, name)
+    if os.path.exists(dest):
+        try:
+            verify(dest, entry)
+            return "ok"
+        except DownloadError as e:
+            print(f"{name}: el fichero existente no es válido ({e}), se descarga de nuevo")
+            os.remove(dest)
+
+    source = source_for(name, entry, mirror)
+    part = dest + ".part"
+    with tqdm.tqdm(desc=name, unit="B", unit_scale=True, position=position, leave=False) as progress:
+        for attempt in range(1, RETRIES + 1):
+            try:
+                if "://" in source:
+                    _fetch_http(source, part, progress)
+                else:
+                    _fetch_local(source, part, progress)
+                verify(part, entry)
+                break
+            except DownloadError:
+                # lo descargado no vale: se borra para no reanudar sobre ello
+                _discard(part)
+                if attempt == RETRIES:
+                    raise
+            except (requests.RequestException, OSError) as e:
+                if attempt == RETRIES or not _retryable(e):
+                    raise DownloadError(str(e)) from e
+                time.sleep(min(30, 2 ** attempt))
+
+    os.replace(part, dest)
+    _discard(part)
+    return "descargado"
+
+
+# ================================================================
+# ------------------ PROGRAMA ------------------------------------
+# ================================================================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="*", help=f"niveles a descargar (por defecto {', '.join(config.model_tiers)})")
+    parser.add_argument("--mirror", default=os.environ.get("MODELS_MIRROR"),
+                        help="directorio local, file:// o URL base con los .task")
+    parser.add_argument("--dest", default=config.models_dir, help="directorio de destino")
+    parser.add_argument("--workers", type=int, default=3, help="descargas simultáneas")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--write-manifest", action="store_true",
+                        help="guarda en el manifiesto el tamaño y SHA-256 de los modelos descargados")
+    parser.add_argument("--allow-unverified", action="store_true",
+                        help="instala modelos aunque el manifiesto no tenga su SHA-256")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    tiers = args.models or config.model_tiers
+    names = [os.path.basename(config.model_path_for(t)) for t in tiers]
+    unknown = [n for n in names if n not in manifest]
+    if unknown:
+        parser.error(f"modelos que no están en el manifiesto: {', '.join(unknown)}")
+    allow_unverified = args.allow_unverified or args.write_manifest
+    unpinned = [n for n in names if not pinned(manifest[n])]
+    if unpinned and not allow_unverified:
+        parser.error(f"el manifiesto no tiene el SHA-256 de {', '.join(unpinned)}: "
+                     "fíjalo con --write-manifest desde una descarga de confianza "
+                     "o instala sin verificar con --allow-unverified")
+    os.makedirs(args.dest, exist_ok=True)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(download, name, manifest[name], args.dest, args.mirror, i, allow_unverified): name
+                   for i, name in enumerate(names)}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                print(f"{name}: {future.result()}")
+            except Exception as e:
+                print(f"{name}: error ({e})")
+                failed.append(name)
+
+    if args.write_manifest:
+        for name in names:
+            path = os.path.join(args.dest, name)
+            if name not in failed and os.path.exists(path):
+                manifest[name]["size"] = os.path.getsize(path)
+                manifest[name]["sha256"] = file_digest(path)
+        with open(args.manifest, "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+        print(f"Manifiesto actualizado: {args.manifest}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
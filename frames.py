@@ -0,0 +1,30 @@
+import numpy as np
+
+
+# ================================================================
+# ------------------ BUFFERS DE FRAMES REUTILIZABLES -------------
+# ================================================================
+class FramePool:
+    """Buffers de imagen con nombre que se reservan una vez y se reutilizan.
+
+    ``get`` devuelve una vista contigua del tamaño pedido sobre un bloque
+    plano que solo crece: con la resolución fija (o con recortes que nunca
+    superan el frame) no se vuelve a reservar memoria. Se usan como ``dst=``
+    de las funciones de OpenCV. El contenido de un buffer es válido hasta la
+    siguiente llamada a ``get`` con el mismo nombre.
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        size = 1
+        for n in shape:
+            size *= n
+        block = self._blocks.get(name)
+        if block is None or block.size < size or block.dtype != dtype:
+            block = np.empty(size, dtype=dtype)
+            self._blocks[name] = block
+            self.allocations += 1
+        return block[:size].reshape(shape)
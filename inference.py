@@ -0,0 +1,580 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from frames import FramePool
+from startup import BackgroundTask
+from landmarks import HAND_FOOT_LANDMARKS, hip_x
+from tracking import ConstantVelocityPredictor
+
+
+# ================================================================
+# ------------------- CONFIGURACIÓN MEDIAPIPE --------------------
+# ================================================================
+BaseOptions = mp.tasks.BaseOptions
+PoseLandmarker = mp.tasks.vision.PoseLandmarker
+PoseLandmarkerOptions = mp.tasks.vision.PoseLandmarkerOptions
+VisionRunningMode = mp.tasks.vision.RunningMode
+PoseLandmarkerResult = mp.tasks.vision.PoseLandmarkerResult
+NormalizedLandmark = mp.tasks.components.containers.NormalizedLandmark
+
+WARMUP_INFERENCES = 3
+
+
+class PoseEstimator:
+    """PoseLandmarker en modo VIDEO: cada llamada espera al resultado."""
+
+    def __init__(self, model_path, num_poses=1):
+        options = PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=VisionRunningMode.VIDEO,
+            num_poses=num_poses
+        )
+        self._landmarker = PoseLandmarker.create_from_options(options)
+        self.last_latency_ms = 0.0
+        self.latency_count = 0      # Inferencias medidas hasta ahora
+        self.result_timestamp_ms = None
+
+    @property
+    def queue_depth(self):
+        return 0
+
+    def detect(self, mp_image, timestamp_ms):
+        t0 = time.perf_counter()
+        result = self._landmarker.detect_for_video(mp_image, int(timestamp_ms))
+        self.last_latency_ms = (time.perf_counter() - t0) * 1000.0
+        self.latency_count += 1
+        self.result_timestamp_ms = int(timestamp_ms)
+        return result
+
+    def close(self):
+        self._landmarker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncPoseEstimator:
+    """PoseLandmarker en modo LIVE_STREAM con ``detect_async``.
+
+    ``detect`` envía el frame actual y devuelve inmediatamente el resultado
+    más reciente que haya llegado por el callback, de modo que el frame N+1
+    se dibuja con los landmarks del frame N mientras este se sigue infiriendo.
+    Si ya hay ``max_queue_depth`` frames en vuelo, el frame no se envía.
+    """
+
+    def __init__(self, model_path, num_poses=1, max_queue_depth=2):
+        options = PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=VisionRunningMode.LIVE_STREAM,
+            num_poses=num_poses,
+            result_callback=self._on_result
+        )
+        self.max_queue_depth = max(1, max_queue_depth)
+        self._lock = threading.Lock()
+        self._pending = {}          # timestamp_ms -> instante de envío
+        self._latest = None
+        self._latest_ts = None
+        self._result_ts = None
+
+        self.last_latency_ms = 0.0
+        self.latency_count = 0
+        self.frames_skipped = 0     # no enviados (cola llena) o descartados por MediaPipe
+        self._landmarker = PoseLandmarker.create_from_options(options)
+
+    @property
+    def queue_depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        now = time.perf_counter()
+        with self._lock:
+            sent = self._pending.pop(timestamp_ms, None)
+            # MediaPipe descarta frames cuando va retrasado: los anteriores ya no llegarán
+            stale = [ts for ts in self._pending if ts < timestamp_ms]
+            for ts in stale:
+                del self._pending[ts]
+            self.frames_skipped += len(stale)
+
+            if sent is not None:
+                self.last_latency_ms = (now - sent) * 1000.0
+                self.latency_count += 1
+            self._latest = result
+            self._latest_ts = timestamp_ms
+
+    @property
+    def result_timestamp_ms(self):
+        """Timestamp del frame al que corresponde el último resultado devuelto."""
+        return self._result_ts
+
+    def detect(self, mp_image, timestamp_ms):
+        ts = int(timestamp_ms)
+        with self._lock:
+            busy = len(self._pending) >= self.max_queue_depth
+            if busy:
+                self.frames_skipped += 1
+            else:
+                self._pending[ts] = time.perf_counter()
+            latest = self._latest
+            self._result_ts = self._latest_ts
+
+        if not busy:
+            self._landmarker.detect_async(mp_image, ts)
+        return latest
+
+    def close(self):
+        self._landmarker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AdaptivePoseEstimator:
+    """Cambia de modelo (lite/full/heavy) según la latencia de inferencia medida.
+
+    Lleva la media de las últimas ``window`` inferencias. Si supera el
+    presupuesto baja un nivel; si queda por debajo de ``budget * upgrade_ratio``
+    sube uno. Un nivel del que ya se ha bajado por lento no se vuelve a probar.
+
+    El modelo nuevo se carga y se calienta en un hilo aparte (``loading``)
+    mientras se sigue infiriendo con el actual; se cambia en el primer
+    ``detect`` después de que esté listo, así que la partida no se congela.
+    """
+
+    def __init__(self, config, tier=None):
+        self.config = config
+        self.tiers = [t for t in config.model_tiers if os.path.exists(config.model_path_for(t))]
+        if not self.tiers:
+            raise FileNotFoundError(f"No hay modelos en {config.models_dir}")
+
+        default = os.path.basename(config.model_path)
+        start = tier or next((t for t in self.tiers if config.model_path_for(t).endswith(default)),
+                             self.tiers[0])
+        self.tier_index = self.tiers.index(start)
+        self._max_tier_index = len(self.tiers) - 1
+
+        self._window = deque(maxlen=config.adaptive_window)
+        self._seen_count = 0
+        self._estimator = _create_estimator(config, config.model_path_for(self.tier))
+        self.loading = None         # BackgroundTask que carga el siguiente modelo
+        self._loading_index = None
+        self._last_result = None
+        self._last_result_ts = None
+        self._swap_ts = None        # hasta que el modelo nuevo responda a un frame desde aquí
+        print(f"Modelo de pose: {self.tier}")
+
+    @property
+    def tier(self):
+        return self.tiers[self.tier_index]
+
+    @property
+    def queue_depth(self):
+        return self._estimator.queue_depth
+
+    @property
+    def last_latency_ms(self):
+        return self._estimator.last_latency_ms
+
+    @property
+    def result_timestamp_ms(self):
+        return self._last_result_ts
+
+    def _start_loading(self, index):
+        tier = self.tiers[index]
+        path = self.config.model_path_for(tier)
+
+        def load():
+            estimator = _create_estimator(self.config, path)
+            _warm_up_estimator(estimator)
+            return estimator
+
+        self._loading_index = index
+        self.loading = BackgroundTask(f"modelo {tier}", load)
+
+    def _swap(self):
+        task, self.loading = self.loading, None
+        try:
+            estimator = task.result()
+        except Exception as e:
+            print(f"No se pudo cargar el modelo {self.tiers[self._loading_index]}: {e!r}")
+            if self._loading_index > self.tier_index:
+                self._max_tier_index = self.tier_index    # no se vuelve a intentar subir
+            self._window.clear()
+            return False
+        self._estimator.close()
+        self._estimator = estimator
+        self.tier_index = self._loading_index
+        self._window.clear()
+        self._seen_count = estimator.latency_count
+        print(f"Modelo de pose: {self.tier} (cargado en {task.seconds:.2f} s)")
+        return True
+
+    def detect(self, mp_image, timestamp_ms):
+        if self.loading is not None and self.loading.done and self._swap():
+            self._swap_ts = int(timestamp_ms)
+        result = self._estimator.detect(mp_image, timestamp_ms)
+        result_ts = self._estimator.result_timestamp_ms
+
+        # en modo async el modelo nuevo tarda unos frames en dar su primer
+        # resultado: mientras, se sigue devolviendo el último del anterior
+        if self._swap_ts is not None:
+            if result_ts is not None and result_ts >= self._swap_ts:
+                self._swap_ts = None
+            else:
+                result, result_ts = self._last_result, self._last_result_ts
+        self._last_result, self._last_result_ts = result, result_ts
+
+        count = self._estimator.latency_count
+        if count != self._seen_count:
+            self._seen_count = count
+            # las primeras inferencias de un modelo recién creado son lentas
+            if count > WARMUP_INFERENCES:
+                self._window.append(self._estimator.last_latency_ms)
+            if len(self._window) == self._window.maxlen and self.loading is None:
+                self._adapt(sum(self._window) / len(self._window))
+
+        return result
+
+    def _adapt(self, mean_ms):
+        budget = self.config.inference_budget_ms
+        if mean_ms > budget and self.tier_index > 0:
+            self._max_tier_index = self.tier_index - 1
+            index = self.tier_index - 1
+        elif mean_ms < budget * self.config.adaptive_upgrade_ratio \
+                and self.tier_index < self._max_tier_index:
+            index = self.tier_index + 1
+        else:
+            return
+        print(f"Inferencia media {mean_ms:.1f} ms (presupuesto {budget:.1f} ms), "
+              f"cargando {self.tiers[index]}")
+        self._start_loading(index)
+
+    def close(self):
+        if self.loading is not None:
+            try:
+                self.loading.result().close()
+            except Exception:
+                pass
+            self.loading = None
+        self._estimator.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def warm_up(landmarker, timestamp_ms=0, count=WARMUP_INFERENCES, size=(480, 640), step_ms=33):
+    """Hace ``count`` inferencias sobre frames negros para que la primera real no sea en frío.
+
+    En modo async se espera a cada resultado antes de enviar el siguiente.
+    Devuelve el timestamp a partir del cual puede seguir el juego.
+    """
+    frame = np.zeros((*size, 3), dtype=np.uint8)
+    for _ in range(count):
+        landmarker.detect(frame, timestamp_ms)
+        timestamp_ms += step_ms
+        deadline = time.perf_counter() + 5.0
+        while landmarker.queue_depth and time.perf_counter() < deadline:
+            time.sleep(0.005)
+    return timestamp_ms
+
+
+def _warm_up_estimator(estimator, count=WARMUP_INFERENCES, size=(480, 640), step_ms=33):
+    """Como ``warm_up`` pero sobre un estimador (recibe ``mp.Image``), con timestamps desde 0."""
+    image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.zeros((*size, 3), dtype=np.uint8))
+    for i in range(count):
+        estimator.detect(image, i * step_ms)
+        deadline = time.perf_counter() + 5.0
+        while estimator.queue_depth and time.perf_counter() < deadline:
+            time.sleep(0.005)
+
+
+def _create_estimator(config, model_path):
+    if config.inference_mode == "async":
+        return AsyncPoseEstimator(model_path, config.num_poses, config.async_max_queue_depth)
+    return PoseEstimator(model_path, config.num_poses)
+
+
+def create_pose_estimator(config):
+    """Crea el estimador según ``config.inference_mode`` ("sync" o "async").
+
+    Con ``config.adaptive_model`` se envuelve en un ``AdaptivePoseEstimator``.
+    """
+    if config.adaptive_model:
+        return AdaptivePoseEstimator(config)
+    return _create_estimator(config, config.model_path)
+
+
+# ================================================================
+# ------------------ ENTRADA DE LA INFERENCIA --------------------
+# ================================================================
+class InferenceFrontEnd:
+    """Prepara la imagen que se pasa al estimador y corrige sus landmarks.
+
+    Modos (``mode``):
+      - "full": el frame completo.
+      - "downscale": el frame reducido a ``width`` píxeles de ancho.
+      - "crop": un recorte alrededor de los landmarks del frame anterior,
+        ampliado ``padding`` píxeles; si se pierde el seguimiento se vuelve
+        al frame completo. También se reduce a ``width`` si es más ancho.
+
+    Los landmarks se devuelven siempre normalizados respecto al frame
+    completo, así que el resto del juego no nota la diferencia.
+
+    El frame llega en BGR (OpenCV) y se pasa a RGB antes de crear el
+    ``mp.Image``. El reducido y la conversión escriben en buffers propios que
+    se reutilizan entre frames; ``mp.Image`` copia los datos, así que se
+    pueden sobrescribir aunque la inferencia sea asíncrona.
+    """
+
+    MAX_PENDING = 16
+
+    def __init__(self, estimator, mode="full", width=None, padding=100):
+        self.estimator = estimator
+        self.mode = mode
+        self.width = width
+        self.padding = padding
+
+        self._boxes = {}            # timestamp_ms -> recorte usado (x1, y1, x2, y2) o None
+        self._last_result = None
+        self._roi = None
+        self._frames = FramePool()
+
+    @property
+    def queue_depth(self):
+        return self.estimator.queue_depth
+
+    @property
+    def last_latency_ms(self):
+        return self.estimator.last_latency_ms
+
+    @property
+    def result_timestamp_ms(self):
+        return self.estimator.result_timestamp_ms
+
+    def detect(self, frame, timestamp_ms):
+        h, w = frame.shape[:2]
+        ts = int(timestamp_ms)
+
+        box = self._roi if self.mode == "crop" else None
+        image = frame if box is None else frame[box[1]:box[3], box[0]:box[2]]
+        if self.mode != "full" and self.width and image.shape[1] > self.width:
+            ih = max(1, round(image.shape[0] * self.width / image.shape[1]))
+            image = cv2.resize(image, (self.width, ih), interpolation=cv2.INTER_AREA,
+                               dst=self._frames.get("resize", (ih, self.width, 3)))
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._frames.get("rgb", image.shape))
+
+        self._boxes[ts] = box
+        if len(self._boxes) > self.MAX_PENDING:
+            del self._boxes[min(self._boxes)]
+
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image)
+        result = self.estimator.detect(mp_image, ts)
+        if result is None or result is self._last_result:
+            return result
+
+        # resultado nuevo: se pasa a coordenadas del frame completo una sola vez
+        result_ts = self.estimator.result_timestamp_ms
+        result_box = self._boxes.get(result_ts)
+        for old in [t for t in self._boxes if result_ts is not None and t <= result_ts]:
+            del self._boxes[old]
+        if result_box is not None:
+            _remap_landmarks(result, result_box, w, h)
+
+        self._last_result = result
+        if self.mode == "crop":
+            self._roi = self._roi_from(result, w, h)
+        return result
+
+    def _roi_from(self, result, w, h):
+        if not result.pose_landmarks:
+            return None
+        xs = [lm.x for person in result.pose_landmarks for lm in person]
+        ys = [lm.y for person in result.pose_landmarks for lm in person]
+        x1 = max(0, int(min(xs) * w) - self.padding)
+        y1 = max(0, int(min(ys) * h) - self.padding)
+        x2 = min(w, int(max(xs) * w) + self.padding)
+        y2 = min(h, int(max(ys) * h) + self.padding)
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            return None
+        return (x1, y1, x2, y2)
+
+    def close(self):
+        self.estimator.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _remap_landmarks(result, box, w, h):
+    """Convierte en el sitio landmarks normalizados al recorte ``box`` en normalizados al frame."""
+    x1, y1, x2, y2 = box
+    sx = (x2 - x1) / w
+    sy = (y2 - y1) / h
+    ox = x1 / w
+    oy = y1 / h
+    for person in result.pose_landmarks:
+        for lm in person:
+            lm.x = ox + lm.x * sx
+            lm.y = oy + lm.y * sy
+            if lm.z is not None:
+                lm.z = lm.z * sx
+
+
+# ================================================================
+# ------------------ INFERENCIA A SALTOS -------------------------
+# ================================================================
+class FrameSkipper:
+    """Infiere solo cada ``interval`` frames y predice manos y pies entre medias.
+
+    Con ``adaptive`` el intervalo se recalcula tras cada inferencia para que
+    quepa en ``frame_budget_ms``. En los frames sin inferencia se devuelve el
+    último resultado real con los puntos de ``indices`` extrapolados al
+    timestamp del frame. Cuando llega un resultado real se mide cuánto se
+    equivocó la predicción (``last_prediction_error_px``).
+
+    ``predictor`` puede ser cualquier filtro de ``tracking`` (velocidad
+    constante por defecto). Si se da ``lead_ms``, también los frames con
+    inferencia devuelven los puntos filtrados y adelantados al instante en que
+    se mostrarán: timestamp del frame + tiempo gastado en ``detect`` +
+    ``lead_ms``.
+
+    Con varias personas, los resultados nuevos se ordenan de izquierda a
+    derecha por la cadera antes de pasar por el filtro, para que cada
+    persona siga con su propio estado aunque MediaPipe cambie el orden.
+    """
+
+    def __init__(self, inner, interval=1, adaptive=False, frame_budget_ms=33.0,
+                 indices=HAND_FOOT_LANDMARKS, predictor=None, lead_ms=None):
+        self.inner = inner
+        self.interval = max(1, interval)
+        self.adaptive = adaptive
+        self.frame_budget_ms = frame_budget_ms
+        self.indices = list(indices)
+        self.predictor = predictor or ConstantVelocityPredictor()
+        self.lead_ms = lead_ms
+
+        self._frames_since = self.interval
+        self._last_real = None
+        self.last_prediction_error_px = 0.0
+        self._error_sum = 0.0
+        self._error_count = 0
+
+    @property
+    def mean_prediction_error_px(self):
+        return self._error_sum / self._error_count if self._error_count else 0.0
+
+    def reset_prediction_error(self):
+        """Vuelve a empezar la media de ``mean_prediction_error_px`` (p. ej. al empezar una partida)."""
+        self.last_prediction_error_px = 0.0
+        self._error_sum = 0.0
+        self._error_count = 0
+
+    @property
+    def queue_depth(self):
+        return self.inner.queue_depth
+
+    @property
+    def last_latency_ms(self):
+        return self.inner.last_latency_ms
+
+    @property
+    def result_timestamp_ms(self):
+        """Timestamp de la última inferencia real (no cambia en los frames extrapolados)."""
+        return self.inner.result_timestamp_ms
+
+    @property
+    def detection(self):
+        """Último resultado real tal como salió del estimador, sin filtrar ni extrapolar."""
+        return self._last_real
+
+    def detect(self, frame, timestamp_ms):
+        h, w = frame.shape[:2]
+        t0 = time.perf_counter()
+
+        result = None
+        if self._frames_since >= self.interval - 1:
+            self._frames_since = 0
+            result = self.inner.detect(frame, timestamp_ms)
+            if self.adaptive:
+                self.interval = max(1, int(np.ceil(self.inner.last_latency_ms / self.frame_budget_ms)))
+        else:
+            self._frames_since += 1
+
+        fresh = result is not None and result is not self._last_real
+        if fresh:
+            self._observe(result, w, h)
+            if self.lead_ms is None:
+                return result
+
+        if self._last_real is None or not self.predictor.ready:
+            return result
+
+        target_ms = timestamp_ms
+        if self.lead_ms is not None:
+            target_ms += (time.perf_counter() - t0) * 1000.0 + self.lead_ms
+        return _with_points(self._last_real, self.predictor.predict(target_ms), self.indices)
+
+    def _observe(self, result, w, h):
+        self._last_real = result
+        if not result.pose_landmarks:
+            self.predictor.reset()
+            return
+        # el filtro guarda su estado por posición: las personas tienen que
+        # llegar siempre en el mismo orden, no en el que las devuelve MediaPipe
+        result.pose_landmarks.sort(key=hip_x)
+
+        pts = np.array([[(person[i].x, person[i].y) for i in self.indices]
+                        for person in result.pose_landmarks], dtype=np.float32)
+        t = self.inner.result_timestamp_ms
+
+        if self.predictor.ready:
+            predicted = self.predictor.predict(t)
+            if predicted.shape == pts.shape:
+                err = (predicted - pts) * (w, h)
+                self.last_prediction_error_px = float(np.sqrt((err ** 2).sum(axis=-1)).mean())
+                self._error_sum += self.last_prediction_error_px
+                self._error_count += 1
+
+        self.predictor.update(pts, t)
+
+    def close(self):
+        self.inner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _with_points(result, points, indices):
+    """Copia de ``result`` con los landmarks ``indices`` cambiados por ``points``."""
+    people = []
+    for person, pts in zip(result.pose_landmarks, points):
+        person = list(person)
+        for (x, y), idx in zip(pts, indices):
+            lm = person[idx]
+            person[idx] = NormalizedLandmark(x=float(x), y=float(y), z=lm.z,
+                                             visibility=lm.visibility, presence=lm.presence)
+        people.append(person)
+    return PoseLandmarkerResult(pose_landmarks=people,
+                                pose_world_landmarks=result.pose_world_landmarks,
+                                segmentation_masks=result.segmentation_masks)
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+
+
+# ================================================================
+# ------------------ ÍNDICES DE LANDMARKS ------------------------
+# ================================================================
+LEFT_HAND = 19
+RIGHT_HAND = 20
+LEFT_FOOT = 31
+RIGHT_FOOT = 32
+HAND_FOOT_LANDMARKS = (LEFT_HAND, RIGHT_HAND, LEFT_FOOT, RIGHT_FOOT)
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_HIP = 23
+RIGHT_HIP = 24
+SHOULDERS = (LEFT_SHOULDER, RIGHT_SHOULDER)
+HIPS = (LEFT_HIP, RIGHT_HIP)
+
+LIMB_NAMES = {LEFT_HAND: "mano izquierda", RIGHT_HAND: "mano derecha",
+              LEFT_FOOT: "pie izquierdo", RIGHT_FOOT: "pie derecho"}
+# articulación de la que sale cada extremidad, para medir su alcance
+LIMB_ROOTS = {LEFT_HAND: LEFT_SHOULDER, RIGHT_HAND: RIGHT_SHOULDER,
+              LEFT_FOOT: LEFT_HIP, RIGHT_FOOT: RIGHT_HIP}
+
+# Puntos que se dibujan en el juego y su color (BGR), en orden de índice
+# para que los círculos se solapen igual que antes
+LEFT_ARM_POINTS = (15, 17, 19, 21)
+RIGHT_ARM_POINTS = (16, 18, 20, 22)
+LEG_POINTS = (27, 28, 31, 32)
+DRAW_POINTS = sorted([(i, (0, 255, 0)) for i in LEFT_ARM_POINTS]
+                     + [(i, (0, 0, 255)) for i in RIGHT_ARM_POINTS]
+                     + [(i, (255, 0, 0)) for i in LEG_POINTS])
+
+
+def hip_x(person):
+    """x media de las caderas de una persona de MediaPipe, para ordenar de izquierda a derecha."""
+    return (person[LEFT_HIP].x + person[RIGHT_HIP].x) / 2
+
+
+# ================================================================
+# ------------------ LANDMARKS EN UN ARRAY -----------------------
+# ================================================================
+class PoseArray:
+    """Landmarks del último resultado en un array (personas, 33, 4) float32.
+
+    Cada fila es (x, y, z, visibilidad) normalizada; las personas que no se
+    detectaron quedan a NaN. Un punto cuenta como visible si su visibilidad
+    llega a ``min_visibility``. El array se reutiliza en cada ``update``, que
+    también calcula de una vez los píxeles y la máscara de visibilidad que
+    usan ``points`` y ``draw``.
+
+    Con varias personas se ordenan de izquierda a derecha por la cadera, para
+    que cada jugador conserve su número (y su color) aunque MediaPipe las
+    devuelva en otro orden.
+
+    Los píxeles y la visibilidad del ``update`` anterior quedan en
+    ``prev_pixels`` y ``prev_visible``, para saber por dónde ha pasado cada
+    punto entre dos frames.
+    """
+
+    def __init__(self, num_poses=1, min_visibility=0.0):
+        self.data = np.full((num_poses, 33, 4), np.nan, dtype=np.float32)
+        self.count = 0
+        self.min_visibility = min_visibility
+        self._px = np.zeros((num_poses, 33, 2), dtype=np.int32)
+        self._prev_px = np.zeros((num_poses, 33, 2), dtype=np.int32)
+        self.pixels = self._px[:0]
+        self.visible = np.zeros((0, 33), dtype=bool)
+        self.prev_pixels = self.pixels
+        self.prev_visible = self.visible
+        self._pixels = []
+        self._visible = []
+
+    @property
+    def num_poses(self):
+        return self.data.shape[0]
+
+    def update(self, result, w, h):
+        """Copia ``result.pose_landmarks`` al array para un frame de w x h. Devuelve self."""
+        people = result.pose_landmarks[:self.num_poses] if result is not None else ()
+        count = len(people)
+        for p, person in enumerate(people):
+            self.data[p].flat = [v for lm in person for v in (lm.x, lm.y, lm.z, lm.visibility or 0.0)]
+        if count < self.count:
+            self.data[count:self.count] = np.nan
+        self.count = count
+        if count > 1:
+            order = np.argsort(self.data[:count, HIPS, 0].mean(axis=1))
+            self.data[:count] = self.data[order]
+
+        live = self.data[:count]
+        self._px, self._prev_px = self._prev_px, self._px
+        self.prev_pixels, self.prev_visible = self.pixels, self.visible
+        self.pixels = self._px[:count]
+        # el cast a int32 trunca hacia cero, igual que int()
+        np.multiply(live[:, :, :2], (w, h), out=self.pixels, casting='unsafe')
+        self.visible = live[:, :, 3] >= self.min_visibility
+        self._pixels = self.pixels.tolist()
+        self._visible = self.visible.tolist()
+        return self
+
+    def points(self, indices, person=0):
+        """Puntos (x, y) en píxeles de ``indices``, o None si no se ven."""
+        if person >= self.count:
+            return [None] * len(indices)
+        px, vis = self._pixels[person], self._visible[person]
+        return [tuple(px[i]) if vis[i] else None for i in indices]
+
+    def point(self, index, person=0):
+        return self.points((index,), person)[0]
+
+    def visible_points(self, indices):
+        """Puntos visibles de ``indices`` de todas las personas, como arrays.
+
+        Devuelve (puntos (n, 2) en píxeles, los mismos puntos en el frame
+        anterior, persona (n,), posición en ``indices`` (n,)). Si un punto no
+        se veía en el frame anterior, su posición anterior es la actual.
+        """
+        vis = self.visible[:, indices]
+        person, which = np.nonzero(vis)
+        points = self.pixels[:, indices][vis]
+        previous = points.copy()
+        idx = np.asarray(indices)[which]
+        seen = person < len(self.prev_visible)
+        seen[seen] = self.prev_visible[person[seen], idx[seen]]
+        previous[seen] = self.prev_pixels[person[seen], idx[seen]]
+        return points, previous, person, which
+
+    def draw(self, frame, radius=6, colors=None):
+        """Círculos en muñecas, manos, tobillos y pies de todas las personas.
+
+        Con ``colors`` cada persona se dibuja entera en su color.
+        """
+        for p, (px, vis) in enumerate(zip(self._pixels, self._visible)):
+            for idx, color in DRAW_POINTS:
+                if vis[idx]:
+                    cv2.circle(frame, px[idx], radius, color if colors is None else colors[p], -1)
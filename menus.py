@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+
+from sprites import Sprite
+
+
+# ================================================================
+# ------------------ MENÚS PRE-RENDERIZADOS ----------------------
+# ================================================================
+MENU_ALPHA = 0.6
+
+
+def rect_from_rel(rel, w, h):
+    x1 = int(rel[0] * w)
+    y1 = int(rel[1] * h)
+    x2 = int(rel[2] * w)
+    y2 = int(rel[3] * h)
+    return (x1, y1, x2, y2)
+
+
+class MenuRenderer:
+    """Dibuja un menú de botones reutilizando una capa estática cacheada.
+
+    El fondo, el título, los bordes y textos de los botones y la línea de
+    ayuda no cambian entre frames, así que se dibujan una vez por resolución.
+    Cada frame solo se mezcla la región del menú (``addWeighted`` sobre la
+    ROI) y las capas pequeñas de lo que sobresale de ella; en vivo solo se
+    dibuja la barra de progreso.
+    """
+
+    def __init__(self, title, hint, buttons_rel):
+        self.title = title
+        self.hint = hint
+        self.buttons_rel = buttons_rel
+        self._size = None
+        self._buttons = None
+        self._menu_rect = None
+        self._menu_layer = None
+        self._fringe = []
+        self._bar_buf = None
+
+    def layout(self, w, h):
+        """Rectángulos de los botones para un frame de ``w`` x ``h``."""
+        if self._size != (w, h):
+            self._build(w, h)
+        return self._buttons
+
+    def _build(self, w, h):
+        self._size = (w, h)
+        self._buttons = {name: rect_from_rel(rel, w, h) for name, rel in self.buttons_rel.items()}
+
+        mx1, my1, mx2, my2 = int(0.08*w), int(0.10*h), int(0.92*w), int(0.78*h)
+        title_org = (int(0.12*w), int(0.13*h))
+        hint_org = (int(0.1*w), int(0.85*h))
+
+        # dentro del rectángulo del menú todo se mezcla con la misma alfa, así
+        # que la capa se guarda tal cual y se combina con addWeighted
+        color = np.zeros((h, w, 3), dtype=np.uint8)
+        cv2.rectangle(color, (mx1, my1), (mx2, my2), (20, 20, 20), -1)
+        cv2.putText(color, self.title, title_org, cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+        for name, (x1, y1, x2, y2) in self._buttons.items():
+            cv2.rectangle(color, (x1, y1), (x2, y2), (255, 255, 255), 2)
+            (tw, th), _ = cv2.getTextSize(name, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)
+            tx = x1 + (x2 - x1)//2 - tw//2
+            ty = y1 + (y2 - y1)//2 + th//2
+            cv2.putText(color, name, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+
+        self._menu_rect = (mx1, my1, mx2 + 1, my2 + 1)
+        self._menu_layer = color[my1:my2 + 1, mx1:mx2 + 1].copy()
+
+        # lo que sobresale del rectángulo (el título y la ayuda, que va sin
+        # transparencia) se guarda en capas BGRA pequeñas; la alfa sale de la
+        # cobertura del texto, que puede venir suavizado
+        fringe_color = np.zeros((h, w, 3), dtype=np.uint8)
+        fringe_alpha = np.zeros((h, w), dtype=np.uint8)
+        coverage = np.zeros((h, w), dtype=np.uint8)
+        for text, org, scale, col, a in ((self.title, title_org, 0.9, (255, 255, 255), MENU_ALPHA),
+                                         (self.hint, hint_org, 0.7, (200, 200, 200), 1.0)):
+            coverage[:] = 0
+            cv2.putText(coverage, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, 2)
+            drawn = coverage > 0
+            fringe_color[drawn] = col
+            fringe_alpha[drawn] = np.maximum(fringe_alpha[drawn],
+                                             np.round(coverage[drawn] * a).astype(np.uint8))
+        fringe_alpha[my1:my2 + 1, mx1:mx2 + 1] = 0
+
+        mx2, my2 = mx2 + 1, my2 + 1
+        bands = [(0, my1, 0, w), (my2, h, 0, w), (my1, my2, 0, mx1), (my1, my2, mx2, w)]
+        self._fringe = []
+        for by1, by2, bx1, bx2 in bands:
+            ys, xs = np.nonzero(fringe_alpha[by1:by2, bx1:bx2])
+            if len(ys) == 0:
+                continue
+            y1, y2 = by1 + ys.min(), by1 + ys.max() + 1
+            x1, x2 = bx1 + xs.min(), bx1 + xs.max() + 1
+            layer = Sprite(np.dstack((fringe_color[y1:y2, x1:x2], fringe_alpha[y1:y2, x1:x2])))
+            self._fringe.append((layer, int(x1), int(y1)))
+
+        max_btn_w = max(x2 - x1 for x1, _, x2, _ in self._buttons.values())
+        self._bar_buf = np.empty((9, max_btn_w + 1, 3), dtype=np.uint8)
+
+    def render(self, frame, hovered_btn_name=None, hover_progress=0.0):
+        """Dibuja el menú sobre ``frame`` (en el sitio) y lo devuelve."""
+        h, w = frame.shape[:2]
+        buttons = self.layout(w, h)
+
+        bar = None
+        if hovered_btn_name in buttons:
+            x1, _, x2, y2 = buttons[hovered_btn_name]
+            bar_w = int((x2 - x1) * min(1.0, hover_progress))
+            bar = frame[y2 - 10:y2 - 1, x1:x1 + bar_w + 1]
+            saved = self._bar_buf[:bar.shape[0], :bar.shape[1]]
+            # la barra se mezcla con el frame original, no con la capa del menú
+            cv2.convertScaleAbs(bar, dst=saved, alpha=1.0 - MENU_ALPHA, beta=MENU_ALPHA * 255)
+
+        mx1, my1, mx2, my2 = self._menu_rect
+        roi = frame[my1:my2, mx1:mx2]
+        cv2.addWeighted(self._menu_layer, MENU_ALPHA, roi, 1.0 - MENU_ALPHA, 0, dst=roi)
+        for layer, x1, y1 in self._fringe:
+            layer.blit(frame, x1, y1)
+
+        if bar is not None:
+            bar[:] = saved
+        return frame
@@ -0,0 +1,131 @@
+import json
+import os
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+# ================================================================
+# ------------------ PERFILADO POR ETAPAS ------------------------
+# ================================================================
+class Profiler:
+    """Mide cuánto tarda cada etapa del frame con marcas de vuelta (laps).
+
+    ``begin_frame()`` arranca el reloj y cada ``lap("etapa")`` guarda el tiempo
+    transcurrido desde la marca anterior con ese nombre. ``end_frame()`` guarda
+    además el tiempo total del frame en la etapa "frame". Por etapa se guardan
+    las últimas ``window`` muestras para calcular percentiles, y el conteo,
+    suma y máximo de toda la sesión.
+    """
+
+    OVERLAY_REFRESH_S = 0.5
+
+    def __init__(self, enabled=True, window=10000):
+        self.enabled = enabled
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self._samples = {}
+        self._totals = {}           # etapa -> [conteo, suma, máximo]
+        self._frame_start = None
+        self._last = None
+        self._session_start = time.time()
+        self._overlay_lines = []
+        self._overlay_time = 0.0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._frame_start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        if not self.enabled or self._last is None:
+            return
+        now = time.perf_counter()
+        self._record(stage, (now - self._last) * 1000.0)
+        self._last = now
+
+    def split(self, stage, seconds):
+        """Apunta ``seconds`` como la etapa ``stage`` y se los descuenta a la siguiente ``lap``.
+
+        Sirve para separar una etapa que va intercalada con otra (p. ej. las
+        apariciones dentro de los pasos de física), midiéndola a trozos.
+        """
+        if not self.enabled or self._last is None:
+            return
+        self._record(stage, seconds * 1000.0)
+        self._last += seconds
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        self._record("frame", (time.perf_counter() - self._frame_start) * 1000.0)
+        self._frame_start = self._last = None
+
+    def _record(self, stage, ms):
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = deque(maxlen=self.window)
+            self._totals[stage] = [0, 0.0, 0.0]
+        samples.append(ms)
+        totals = self._totals[stage]
+        totals[0] += 1
+        totals[1] += ms
+        if ms > totals[2]:
+            totals[2] = ms
+
+    def stats(self):
+        """Diccionario etapa -> count, mean, max, p50, p95, p99 (en ms)."""
+        out = {}
+        for stage, samples in self._samples.items():
+            count, total, peak = self._totals[stage]
+            p50, p95, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 95, 99])
+            out[stage] = {
+                "count": count,
+                "mean_ms": total / count,
+                "max_ms": peak,
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+            }
+        return out
+
+    def draw_overlay(self, frame):
+        """Tabla de percentiles en la esquina superior derecha (se refresca cada 0.5 s)."""
+        if not self.enabled:
+            return
+        now = time.time()
+        if now - self._overlay_time > self.OVERLAY_REFRESH_S:
+            self._overlay_time = now
+            self._overlay_lines = [
+                f"{stage:<10} {s['p50_ms']:5.1f} {s['p95_ms']:5.1f} {s['p99_ms']:5.1f}"
+                for stage, s in self.stats().items()
+            ]
+
+        x = frame.shape[1] - 300
+        y = 20
+        cv2.putText(frame, "etapa       p50   p95   p99", (x, y),
+                    cv2.FONT_HERSHEY_PLAIN, 1, (0, 255, 255), 1)
+        for line in self._overlay_lines:
+            y += 16
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_PLAIN, 1, (0, 255, 255), 1)
+
+    def save(self, directory, **session):
+        """Escribe las estadísticas de la sesión en un JSON y devuelve su ruta."""
+        if not self.enabled:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self._session_start))
+        path = os.path.join(directory, f"profile_{stamp}.json")
+        data = {
+            "session_start": self._session_start,
+            "session_seconds": time.time() - self._session_start,
+            **session,
+            "stages": self.stats(),
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        return path
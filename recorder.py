@@ -0,0 +1,226 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+# ================================================================
+# ------------------ GRABACIÓN DE SESIONES -----------------------
+# ================================================================
+# Cada sesión es un directorio con:
+#   landmarks.bin  registros de tamaño fijo (t, frame, fresh, landmarks[personas, 33, 4]);
+#                  fresh = 0 si el frame repite o extrapola el último resultado del modelo
+#   events.bin     registros de tamaño fijo (t, kind, obj_type, slot, x, y, player)
+#   meta.json      fps, personas, tamaño de frame, nombres de tipos y eventos, número de registros
+# Los .bin se abren con np.memmap sin copiar nada (ver ``load_session``).
+
+EVENT_SPAWN = 0
+EVENT_CATCH = 1
+EVENT_MISS = 2
+EVENT_NAMES = ("spawn", "catch", "miss")
+
+EVENT_DTYPE = np.dtype([
+    ("t", "<f8"),
+    ("kind", "u1"),
+    ("obj_type", "u1"),
+    ("slot", "<i2"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("player", "i1"),       # jugador que atrapó el objeto; -1 en los demás eventos
+])
+
+
+def landmark_dtype(num_poses):
+    return np.dtype([
+        ("t", "<f8"),
+        ("frame", "<u4"),
+        ("fresh", "u1"),
+        ("landmarks", "<f4", (num_poses, 33, 4)),
+    ])
+
+
+class SessionRecorder:
+    """Guarda landmarks y eventos de una partida sin frenar el loop de juego.
+
+    Los registros se escriben en bloques (chunks) preasignados en memoria.
+    Cuando un bloque se llena se pasa a un hilo escritor y el juego sigue con
+    otro bloque libre; si el disco va lento y no queda ninguno, se crea uno
+    nuevo en vez de esperar.
+    """
+
+    def __init__(self, directory, num_poses=1, fps=30.0, type_names=(), chunk_records=256, meta=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.num_poses = num_poses
+        self.chunk_records = chunk_records
+        self._meta = {
+            "fps": fps,
+            "num_poses": num_poses,
+            "type_names": list(type_names),
+            "event_names": list(EVENT_NAMES),
+            "created": time.time(),
+            **(meta or {}),
+        }
+
+        self._streams = {
+            "landmarks": _ChunkedStream(os.path.join(directory, "landmarks.bin"),
+                                        landmark_dtype(num_poses), chunk_records),
+            "events": _ChunkedStream(os.path.join(directory, "events.bin"),
+                                     EVENT_DTYPE, chunk_records),
+        }
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="SessionRecorder", daemon=True)
+        self._writer.start()
+        self.frames = 0
+        self.events = 0
+
+    def record_frame(self, t, landmarks, fresh=True):
+        """``landmarks`` es el array (personas, 33, 4) de un ``PoseArray``.
+
+        ``fresh`` es False si no vienen de una inferencia nueva sino que
+        repiten o extrapolan la anterior (``FrameSkipper``).
+        """
+        rec = self._next("landmarks")
+        rec["t"] = t
+        rec["frame"] = self.frames
+        rec["fresh"] = fresh
+        rec["landmarks"] = landmarks
+        self.frames += 1
+
+    def record_event(self, t, kind, obj_type, slot, x, y, player=-1):
+        rec = self._next("events")
+        rec["t"] = t
+        rec["kind"] = kind
+        rec["obj_type"] = obj_type
+        rec["slot"] = slot
+        rec["x"] = x
+        rec["y"] = y
+        rec["player"] = player
+        self.events += 1
+
+    def record_objects(self, t, kind, objects, slots, players=None):
+        """Un evento por cada slot de ``objects`` (un ``ObjectPool``), con su jugador si se da."""
+        for i, slot in enumerate(slots):
+            player = -1 if players is None else players[i]
+            self.record_event(t, kind, objects.type[slot], slot, objects.x[slot], objects.y[slot], player)
+
+    def _next(self, name):
+        stream = self._streams[name]
+        rec, full = stream.next_record()
+        if full is not None:
+            self._queue.put((stream, full, len(full)))
+        return rec
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            stream, chunk, count = item
+            stream.write(chunk, count)
+
+    def close(self, **info):
+        """Vacía lo pendiente, espera al escritor y guarda meta.json (con ``info`` añadido)."""
+        for stream in self._streams.values():
+            chunk, count = stream.take_partial()
+            if count:
+                self._queue.put((stream, chunk, count))
+        self._queue.put(None)
+        self._writer.join()
+        for stream in self._streams.values():
+            stream.close()
+
+        self._meta.update(info, frames=self.frames, events=self.events)
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump(self._meta, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ChunkedStream:
+    """Bloques preasignados de registros de un dtype y el fichero donde acaban."""
+
+    def __init__(self, path, dtype, chunk_records):
+        self.dtype = dtype
+        self.chunk_records = chunk_records
+        self._file = open(path, "wb")
+        self._free = queue.SimpleQueue()
+        self._free.put(np.zeros(chunk_records, dtype=dtype))
+        self._free.put(np.zeros(chunk_records, dtype=dtype))
+        self._chunk = self._take_free()
+        self._used = 0
+
+    def _take_free(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            return np.zeros(self.chunk_records, dtype=self.dtype)
+
+    def next_record(self):
+        """Devuelve (registro a rellenar, bloque lleno para escribir o None)."""
+        full = None
+        if self._used == self.chunk_records:
+            full = self._chunk
+            self._chunk = self._take_free()
+            self._used = 0
+        rec = self._chunk[self._used]
+        self._used += 1
+        return rec, full
+
+    def take_partial(self):
+        chunk, count = self._chunk, self._used
+        self._chunk = self._take_free()
+        self._used = 0
+        return chunk, count
+
+    def write(self, chunk, count):
+        chunk[:count].tofile(self._file)
+        self._free.put(chunk)
+
+    def close(self):
+        self._file.close()
+
+
+def session_directory(base):
+    """Directorio nuevo para una sesión dentro de ``base``: session_YYYYmmdd_HHMMSS."""
+    path = os.path.join(base, time.strftime("session_%Y%m%d_%H%M%S"))
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(base, time.strftime("session_%Y%m%d_%H%M%S") + f"_{suffix}")
+        suffix += 1
+    return path
+
+
+# ================================================================
+# ------------------ LECTURA -------------------------------------
+# ================================================================
+Session = namedtuple("Session", ["t", "landmarks", "fresh", "events", "meta"])
+
+
+def load_session(directory):
+    """Abre una sesión grabada con np.memmap (sin copiar).
+
+    ``landmarks`` tiene forma (frames, personas, 33, 4), ``fresh`` dice de
+    cada frame si sus landmarks salen de una inferencia nueva y ``events`` es
+    un array estructurado con los campos de ``EVENT_DTYPE``.
+    """
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+
+    frames = _open_records(os.path.join(directory, "landmarks.bin"), landmark_dtype(meta["num_poses"]))
+    events = _open_records(os.path.join(directory, "events.bin"), EVENT_DTYPE)
+    return Session(frames["t"], frames["landmarks"], frames["fresh"].astype(bool), events, meta)
+
+
+def _open_records(path, dtype):
+    if os.path.getsize(path) < dtype.itemsize:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
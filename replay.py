@@ -0,0 +1,304 @@
+"""Ejecuta el juego sin cámara ni pantalla a partir de un vídeo o de landmarks grabados.
+
+Ejemplos::
+
+    python replay.py --video sesion.mp4 --difficulty MEDIO --duration 30 --mode "SOLO MANOS"
+    python replay.py --landmarks sesion.npy --fps 30 --size 640x480 --json informe.json
+    python replay.py --landmarks recordings/session_20250101_120000
+    python replay.py --landmarks sesion.npy --duration 60 --seed 7 --save-timeline t7.npz
+    python replay.py --video sesion.mp4 --duration 60 --timeline t7.npz
+    python replay.py --video sesion.mp4 --model lite --duration 30
+
+Sin ``--difficulty``/``--duration``/``--mode`` se recorren los menús igual
+que en una partida normal, con la mano que aparezca en la grabación. Una
+sesión grabada por el juego se reproduce con sus ajustes y sus apariciones
+de objetos (``timeline.npz``), frame a frame en los mismos instantes y
+con el mismo tamaño de frame, así que da la misma partida.
+
+Con ``--video`` se infiere siempre en modo "sync", con un modelo fijo
+(``--model``, por defecto el de ``config.model_path``) y en todos los frames
+o cada ``config.inference_interval``, sin el modelo ni el intervalo
+adaptativos: así el mismo vídeo da la misma partida en cualquier equipo.
+``--adaptive`` deja la inferencia como en el juego.
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import app
+from camera import VideoFileSource
+from config import config
+from display import NullDisplay
+from recorder import load_session
+from simulation import SpawnTimeline
+from inference import NormalizedLandmark, PoseLandmarkerResult
+from world import ObjectPool
+
+
+# ================================================================
+# ------------------ FUENTES GRABADAS ----------------------------
+# ================================================================
+class BlankFrameSource:
+    """Frames negros de tamaño fijo, para reproducir solo landmarks.
+
+    El instante de cada frame es ``índice / fps`` o, si se da ``times``, el
+    que tenga en ese array (segundos), p. ej. la columna ``t`` de una sesión
+    grabada. Devuelve siempre el mismo array: el juego no dibuja sobre el
+    frame capturado sino sobre su copia volteada.
+    """
+
+    def __init__(self, num_frames, width=640, height=480, fps=30, times=None):
+        self.num_frames = num_frames if times is None else min(num_frames, len(times))
+        self.fps = fps
+        self.times = times
+        self.frame_index = 0
+        self.current_time = 0.0
+        self._frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def read(self, timeout=None):
+        if self.frame_index >= self.num_frames:
+            return False, None, None
+        if self.times is not None:
+            self.current_time = float(self.times[self.frame_index])
+        else:
+            self.current_time = self.frame_index / self.fps
+        self.frame_index += 1
+        return True, self._frame, self.current_time
+
+    def isOpened(self):
+        return self.frame_index < self.num_frames
+
+    def get(self, prop):
+        return self.fps if prop == cv2.CAP_PROP_FPS else 0
+
+    def release(self):
+        pass
+
+
+class LandmarkStreamPlayer:
+    """Sustituye al estimador devolviendo landmarks grabados, uno por llamada.
+
+    ``landmarks`` tiene forma (frames, 33, 4) o (frames, personas, 33, 4) con
+    (x, y, z, visibilidad) normalizados; una fila con NaN significa que en ese
+    frame no se detectó a nadie. Con ``fps`` la fila se elige por el
+    timestamp que se pide (la del frame de ese instante), así que da igual
+    que el juego se salte frames; sin él se devuelve una fila por llamada.
+    Con ``times`` (instante de cada fila en segundos, como la columna ``t``
+    de una sesión grabada) se elige la última fila que no sea posterior al
+    timestamp, con el mismo redondeo a ms que ``app.landmark_timestamp``.
+    Con ``fresh`` (uno por fila, como el de una sesión grabada) las filas a
+    False cuentan como repetidas o extrapoladas: ``result_timestamp_ms`` se
+    queda en el de la última fila nueva, igual que con un ``FrameSkipper``.
+    """
+
+    queue_depth = 0
+    last_latency_ms = 0.0
+
+    def __init__(self, landmarks, fps=None, times=None, fresh=None):
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if landmarks.ndim == 3:
+            landmarks = landmarks[:, None]
+        self.landmarks = landmarks
+        self.fps = fps
+        self.fresh = fresh
+        self._times_ms = None
+        if times is not None:
+            self._times_ms = (np.asarray(times, dtype=np.float64) * 1000).astype(np.int64)
+        self.index = 0
+        self.result_timestamp_ms = None
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def detect(self, frame, timestamp_ms):
+        if self._times_ms is not None:
+            self.index = max(0, int(np.searchsorted(self._times_ms, timestamp_ms, side="right")) - 1)
+        elif self.fps is not None:
+            self.index = int(round(timestamp_ms * self.fps / 1000.0))
+        index = min(self.index, len(self.landmarks) - 1)
+        row = self.landmarks[index]
+        self.index += 1
+        if self.fresh is None or self.fresh[index]:
+            self.result_timestamp_ms = int(timestamp_ms)
+
+        people = []
+        for person in row:
+            if np.isnan(person[:, 0]).any():
+                continue
+            people.append([NormalizedLandmark(x=float(x), y=float(y), z=float(z), visibility=float(v))
+                           for x, y, z, v in person])
+        return PoseLandmarkerResult(pose_landmarks=people, pose_world_landmarks=[],
+                                    segmentation_masks=None)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ================================================================
+# ------------------ SESIÓN SIN PANTALLA -------------------------
+# ================================================================
+def run_session(source, landmarker, settings=None, seed=0, objects=None, timeline=None, players=None):
+    """Menús (si no se dan ``settings``) y una partida sobre ``source``.
+
+    El reloj del juego es el instante del último frame leído, así que la
+    partida dura lo mismo en frames vaya a la velocidad que vaya. Las
+    apariciones salen de ``timeline`` o, si no se da, de ``seed``. Con
+    ``players`` se juega con ese número de personas en vez de
+    ``config.num_poses``. Devuelve un informe con frames, fps, la
+    distribución de tiempos por etapa, las métricas de movimiento y, si
+    ``landmarker`` es un ``FrameSkipper``, el error medio de sus
+    predicciones durante la partida.
+    """
+    display = NullDisplay()
+    if objects is None:
+        objects = ObjectPool(app.load_game_sprites(), config.max_objects)
+
+    app.profiler.reset()
+    t0 = time.perf_counter()
+    timestamp = 0
+
+    if settings is None:
+        settings, timestamp = app.run_menus(landmarker, source, display, timestamp)
+    scores = analytics = None
+    if settings is not None:
+        if timeline is None:
+            timeline = app.make_timeline(settings, seed)
+        game = app.PlayState(settings, objects, timeline, players=players)
+        if hasattr(landmarker, "reset_prediction_error"):
+            landmarker.reset_prediction_error()
+        timestamp = app.run_states(landmarker, source, display, timestamp, game)
+        scores = game.scores.tolist()
+        analytics = game.analytics.summary()
+
+    wall_s = time.perf_counter() - t0
+    frames = display.frames_shown
+    return {
+        "settings": settings,
+        "seed": timeline.seed if timeline is not None else seed,
+        "score": sum(scores) if scores is not None else None,
+        "scores": scores,
+        "frames": frames,
+        "wall_seconds": wall_s,
+        "fps": frames / wall_s if wall_s > 0 else 0.0,
+        "stages": app.profiler.stats(),
+        "analytics": analytics,
+        "prediction_error_px": getattr(landmarker, "mean_prediction_error_px", None),
+    }
+
+
+def print_report(report):
+    print(f"Ajustes: {report['settings']}  semilla: {report['seed']}  puntos: {report['score']}"
+          + (f" {report['scores']}" if report["scores"] and len(report["scores"]) > 1 else ""))
+    print(f"{report['frames']} frames en {report['wall_seconds']:.2f} s -> {report['fps']:.1f} fps")
+    analytics = report["analytics"]
+    if analytics is not None and analytics["catch_rate"] is not None:
+        reaction = analytics["reaction_s"]
+        print(f"Atrapados {analytics['catch_rate']:.0%}"
+              + (f"  reacción media {reaction['mean']:.2f} s (p90 {reaction['p90']:.2f})"
+                 if reaction["mean"] is not None else ""))
+    if report["prediction_error_px"] is not None:
+        print(f"Error medio de la predicción de manos y pies: {report['prediction_error_px']:.1f} px")
+    print(f"{'etapa':<12}{'media':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  (ms)")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<12}{s['mean_ms']:8.2f}{s['p50_ms']:8.2f}{s['p95_ms']:8.2f}"
+              f"{s['p99_ms']:8.2f}{s['max_ms']:8.2f}")
+
+
+def parse_settings(args):
+    if args.difficulty is None and args.duration is None and args.mode is None:
+        return None
+    return (app.DIFFICULTY_MULTIPLIERS[args.difficulty or 'MEDIO'],
+            args.duration or 30,
+            args.mode or app.GAME_MODES[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--video", help="vídeo grabado con la cámara del juego")
+    src.add_argument("--landmarks", help="fichero .npy con landmarks (frames, [personas,] 33, 4) "
+                                         "o directorio de una sesión grabada")
+    parser.add_argument("--fps", type=float, default=30, help="fps de la grabación de landmarks")
+    parser.add_argument("--size", default="640x480",
+                        help="tamaño de frame para --landmarks (las sesiones grabadas usan el suyo)")
+    parser.add_argument("--difficulty", choices=list(app.DIFFICULTY_MULTIPLIERS))
+    parser.add_argument("--duration", type=int)
+    parser.add_argument("--mode", choices=list(app.GAME_MODES))
+    parser.add_argument("--seed", type=int, default=0, help="semilla de las apariciones de objetos")
+    parser.add_argument("--timeline", help="apariciones guardadas (.npz) en vez de --seed")
+    parser.add_argument("--save-timeline", help="guarda las apariciones usadas en este .npz "
+                                                "(con --difficulty/--duration/--mode)")
+    parser.add_argument("--json", help="guarda el informe en este fichero")
+    parser.add_argument("--model", choices=config.model_tiers,
+                        help="modelo fijo para --video (por defecto el de config.model_path)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="con --video, modelo e intervalo adaptativos como en el juego "
+                             "(el resultado depende de la velocidad del equipo)")
+    args = parser.parse_args()
+
+    settings = parse_settings(args)
+    timeline = SpawnTimeline.load(args.timeline) if args.timeline else None
+    fps = args.fps
+    players = None
+    times = fresh = None
+    w, h = (int(v) for v in args.size.lower().split("x"))
+
+    if args.video:
+        if not args.adaptive:
+            # nada que dependa del tiempo real: mismo modelo y mismos frames inferidos en cualquier equipo
+            config.adaptive_model = False
+            config.inference_interval_adaptive = False
+            config.inference_mode = "sync"
+        if args.model:
+            config.model_path = config.model_path_for(args.model)
+        source = VideoFileSource(args.video)
+        landmarker = app.create_landmarker()
+    else:
+        if os.path.isdir(args.landmarks):
+            session = load_session(args.landmarks)
+            landmarks = session.landmarks
+            meta = session.meta
+            fps = meta["fps"]
+            # cada registro es un frame del juego: se reproduce en su instante y a su tamaño
+            times, fresh = session.t, session.fresh
+            if meta.get("width"):
+                w, h = meta["width"], meta["height"]
+            if settings is None:
+                settings = (meta["difficulty"], meta["duration"], meta["mode"])
+            saved = os.path.join(args.landmarks, "timeline.npz")
+            if timeline is None and os.path.exists(saved):
+                timeline = SpawnTimeline.load(saved)
+        else:
+            landmarks = np.load(args.landmarks, mmap_mode="r")
+        player = LandmarkStreamPlayer(landmarks, fps, times, fresh)
+        players = player.landmarks.shape[1]
+        source = BlankFrameSource(len(player), w, h, fps, times)
+        landmarker = player
+
+    if settings is not None and timeline is None:
+        timeline = app.make_timeline(settings, args.seed)
+    with landmarker:
+        report = run_session(source, landmarker, settings, args.seed, timeline=timeline, players=players)
+    source.release()
+
+    if args.save_timeline and timeline is not None:
+        timeline.save(args.save_timeline)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
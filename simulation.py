@@ -0,0 +1,126 @@
+import numpy as np
+
+
+# ================================================================
+# ------------------ RELOJ DE SIMULACIÓN -------------------------
+# ================================================================
+class FixedStepClock:
+    """Reparte el tiempo real entre pasos de simulación de duración fija.
+
+    Se alimenta con los instantes de captura de cada frame (segundos). El
+    tiempo acumulado se consume en pasos de ``1 / hz``, de modo que la física
+    avanza igual a 15 que a 60 fps. Si un frame llega muy tarde solo se
+    simulan ``max_steps`` pasos y el resto se descarta.
+    """
+
+    def __init__(self, hz=60, max_steps=15):
+        self.dt = 1.0 / hz
+        self.max_steps = max_steps
+        self.time = 0.0
+        self._last = None
+        self._accumulator = 0.0
+
+    def start(self, t):
+        self.time = 0.0
+        self._last = t
+        self._accumulator = 0.0
+
+    def steps(self, t):
+        """Instantes de simulación de los pasos que tocan hasta el tiempo real ``t``."""
+        if self._last is None:
+            self.start(t)
+        self._accumulator += max(0.0, t - self._last)
+        self._last = t
+
+        n = int(self._accumulator / self.dt)
+        self._accumulator -= n * self.dt
+        if n > self.max_steps:
+            n = self.max_steps
+            self._accumulator = 0.0
+        for _ in range(n):
+            yield self.time
+            self.time += self.dt
+
+
+# ================================================================
+# ------------------ APARICIÓN DE OBJETOS ------------------------
+# ================================================================
+class SpawnTimeline:
+    """Todas las apariciones de objetos de una partida, calculadas de antemano.
+
+    Son cuatro arrays ordenados por tiempo: ``t`` (segundos desde el inicio),
+    ``x`` (posición entre 0 y 1 dentro de la franja en la que pueden caer),
+    ``type`` (índice en ``type_names``) y ``speed`` (px/s, ya multiplicada por
+    la dificultad). Con la misma semilla y los mismos ajustes se obtiene la
+    misma partida, y se puede guardar y volver a cargar con ``save``/``load``.
+    """
+
+    MARGIN = 40     # px a cada lado donde no aparecen objetos
+
+    def __init__(self, t, x, type, speed, type_names, seed=None):
+        self.t = t
+        self.x = x
+        self.type = type
+        self.speed = speed
+        self.type_names = list(type_names)
+        self.seed = seed
+        self._next = 0
+
+    def __len__(self):
+        return len(self.t)
+
+    @classmethod
+    def generate(cls, seed, duration, speed_multiplier=1.0, full_body=False,
+                 rate=0.9, speed_range=(60, 180)):
+        """Apariciones de un proceso de Poisson a ``rate`` por segundo durante ``duration`` s.
+
+        Con ``full_body`` salen frutas y balones a partes iguales; si no,
+        solo frutas. ``seed`` None usa una semilla aleatoria, que se guarda.
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (1 << 32))
+        rng = np.random.default_rng(seed)
+
+        # de sobra para cubrir la partida; lo que pase de duration se descarta
+        n = int(rate * duration + 10 * np.sqrt(rate * duration + 1) + 10)
+        t = np.cumsum(rng.exponential(1.0 / rate, n))
+        while t[-1] < duration:
+            t = np.concatenate((t, t[-1] + np.cumsum(rng.exponential(1.0 / rate, n))))
+        t = t[t < duration]
+        n = len(t)
+
+        type_names = ['manzana', 'pera', 'balon']
+        if full_body:
+            types = np.searchsorted([0.33, 0.66], rng.random(n), side='right')
+        else:
+            types = rng.integers(0, 2, n)
+        x = rng.random(n)
+        speed = rng.uniform(speed_range[0], speed_range[1], n) * speed_multiplier
+
+        return cls(t, x.astype(np.float32), types.astype(np.int8), speed.astype(np.float32),
+                   type_names, seed)
+
+    def reset(self):
+        self._next = 0
+
+    def due(self, t, w):
+        """Objetos (tipo, x, velocidad) que aparecen hasta el instante ``t`` y aún no se han dado."""
+        if self._next >= len(self.t) or self.t[self._next] > t:
+            return ()
+        start = self._next
+        self._next = end = int(np.searchsorted(self.t, t, side='right'))
+        span = w - 2 * self.MARGIN
+        xs = (self.MARGIN + self.x[start:end] * span).astype(np.int32).tolist()
+        return [(self.type_names[k], x, s) for k, x, s
+                in zip(self.type[start:end].tolist(), xs, self.speed[start:end].tolist())]
+
+    def save(self, path):
+        np.savez(path, t=self.t, x=self.x, type=self.type, speed=self.speed,
+                 type_names=np.array(self.type_names), seed=np.int64(-1 if self.seed is None else self.seed))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            seed = int(data["seed"])
+            return cls(data["t"], data["x"], data["type"], data["speed"],
+                       data["type_names"].tolist(), None if seed < 0 else seed)
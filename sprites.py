@@ -0,0 +1,69 @@
+import numpy as np
+
+
+# ================================================================
+# ------------------ SPRITES CON ALFA PREMULTIPLICADO ------------
+# ================================================================
+class Sprite:
+    """Imagen preparada una sola vez para pegarla rápido sobre el frame.
+
+    Si la imagen tiene canal alfa se guardan el color ya multiplicado por alfa
+    (``premultiplied``) y la máscara invertida ``1 - alfa`` en float32. Al
+    dibujar se compone ``roi = premultiplied + roi * inv_alpha`` sobre los tres
+    canales a la vez usando un buffer de trabajo propio, sin reservar memoria.
+    """
+
+    def __init__(self, image):
+        self.height, self.width = image.shape[:2]
+
+        if image.ndim == 3 and image.shape[2] == 4:
+            alpha = image[:, :, 3:4].astype(np.float32) / 255.0
+            # +0.5 para que el truncado final a uint8 redondee
+            self.premultiplied = image[:, :, :3].astype(np.float32) * alpha + 0.5
+            # repetida en los tres canales: multiplicar sin broadcasting es bastante más rápido
+            self.inv_alpha = np.repeat(1.0 - alpha, 3, axis=2)
+            self.color = None
+            self._scratch = np.empty((self.height, self.width, 3), dtype=np.float32)
+        else:
+            self.premultiplied = None
+            self.inv_alpha = None
+            self.color = image
+            self._scratch = None
+
+    @property
+    def shape(self):
+        return (self.height, self.width, 3)
+
+    def draw(self, frame, cx, cy):
+        """Dibuja el sprite centrado en (cx, cy), recortado a los bordes del frame."""
+        self.blit(frame, int(cx - self.width / 2), int(cy - self.height / 2))
+
+    def blit(self, frame, x1, y1):
+        """Dibuja el sprite con su esquina superior izquierda en (x1, y1)."""
+        fx1 = max(0, x1)
+        fy1 = max(0, y1)
+        fx2 = min(frame.shape[1], x1 + self.width)
+        fy2 = min(frame.shape[0], y1 + self.height)
+        if fx2 <= fx1 or fy2 <= fy1:
+            return
+
+        sx1 = fx1 - x1
+        sy1 = fy1 - y1
+        sx2 = sx1 + (fx2 - fx1)
+        sy2 = sy1 + (fy2 - fy1)
+
+        roi = frame[fy1:fy2, fx1:fx2]
+
+        if self.inv_alpha is None:
+            roi[:] = self.color[sy1:sy2, sx1:sx2]
+            return
+
+        tmp = self._scratch[:fy2 - fy1, :fx2 - fx1]
+        np.multiply(roi, self.inv_alpha[sy1:sy2, sx1:sx2], out=tmp)
+        tmp += self.premultiplied[sy1:sy2, sx1:sx2]
+        np.copyto(roi, tmp, casting='unsafe')
+
+
+def load_sprites(images):
+    """Convierte un diccionario de imágenes en un diccionario de ``Sprite``."""
+    return {name: Sprite(img) for name, img in images.items()}
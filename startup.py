@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+# ================================================================
+# ------------------ CARGA EN SEGUNDO PLANO ----------------------
+# ================================================================
+class BackgroundTask:
+    """Ejecuta ``fn`` en un hilo propio y guarda su resultado y duración.
+
+    ``result`` espera a que termine y devuelve lo que devolvió ``fn``, o
+    relanza su excepción en el hilo que llama.
+    """
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.seconds = None
+        self._fn = fn
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            self._result = self._fn()
+        except BaseException as e:
+            self._error = e
+        self.seconds = time.perf_counter() - t0
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def print_startup_report(timings):
+    """Imprime los tiempos de arranque (segundos) medidos en ``main``."""
+    print("Arranque: " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in timings.items()))
@@ -0,0 +1,229 @@
+"""Varios puestos de juego en un mismo equipo, cada uno en su propio proceso.
+
+    python stations.py --source 0 --source 1 --source 2 --source 3
+    python stations.py --source 0 --source sesion.mp4 --threads 2
+    python stations.py --source 0 --source 1 --cores 0-3 --cores 4-7
+
+Cada puesto tiene su cámara (índice) o vídeo, su estimador de pose y su
+ventana. Los procesos se reparten los núcleos del equipo (o los de
+``--cores``), quedan fijados a ellos y limitan los hilos de inferencia a
+``--threads``, para que un puesto no le quite CPU a otro. Cada segundo los
+puestos envían al proceso principal sus fps y latencias, que se muestran por
+consola. ESC cierra la ventana de un puesto; Ctrl+C los cierra todos.
+"""
+import argparse
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+
+# Este módulo se importa también en cada proceso de puesto antes de fijar
+# sus hilos: aquí no se importa numpy, cv2 ni mediapipe.
+from config import config
+
+REPORT_INTERVAL_S = 1.0
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+# ================================================================
+# ------------------ REPARTO DE NÚCLEOS --------------------------
+# ================================================================
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cores(text):
+    """'0-3,6' -> [0, 1, 2, 3, 6]."""
+    cores = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        cores.extend(range(int(first), int(last or first) + 1))
+    return cores
+
+
+def split_cores(cores, stations):
+    """Reparte ``cores`` en ``stations`` grupos contiguos; con más puestos que núcleos se comparten."""
+    if stations > len(cores):
+        return [[cores[i % len(cores)]] for i in range(stations)]
+    size = len(cores) // stations
+    return [cores[i * size:(i + 1) * size] for i in range(stations)]
+
+
+def parse_source(text):
+    """Índice de cámara si es un número; si no, ruta de un vídeo."""
+    return int(text) if text.isdigit() else text
+
+
+# ================================================================
+# ------------------ PROCESO DE CADA PUESTO ----------------------
+# ================================================================
+_stats_queue = None
+
+
+def _init_worker(stats_queue):
+    global _stats_queue
+    _stats_queue = stats_queue
+
+
+def _limit_threads(cores, threads):
+    """Fija el proceso a ``cores`` y limita los hilos de las librerías numéricas a ``threads``.
+
+    Tiene que hacerse antes de importar numpy, OpenCV o MediaPipe, que leen
+    estas variables al cargarse.
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+
+class StationReporter:
+    """Envuelve el display del puesto y cada ``interval`` s manda sus estadísticas al proceso principal.
+
+    Las estadísticas se calculan en el propio hilo del juego al mostrar un
+    frame, así que no hace falta bloquear el perfilador.
+    """
+
+    def __init__(self, station, display, profiler, cap, stats_queue, interval=REPORT_INTERVAL_S):
+        self.station = station
+        self.display = display
+        self.profiler = profiler
+        self.cap = cap
+        self.queue = stats_queue
+        self.interval = interval
+        self._frames = 0
+        self._last = time.perf_counter()
+
+    def show(self, frame):
+        self.display.show(frame)
+        self._frames += 1
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._report(self._frames / (now - self._last))
+            self._frames = 0
+            self._last = now
+
+    def _report(self, fps):
+        stages = self.profiler.stats()
+        frame = stages.get("frame", {})
+        inference = stages.get("inference", {})
+        message = {
+            "station": self.station,
+            "fps": fps,
+            "frame_p50_ms": frame.get("p50_ms"),
+            "frame_p95_ms": frame.get("p95_ms"),
+            "inference_p50_ms": inference.get("p50_ms"),
+            "inference_p95_ms": inference.get("p95_ms"),
+            "dropped": getattr(self.cap, "frames_dropped", 0),
+        }
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            pass    # si el proceso principal va atrasado se pierde un informe, no se frena el juego
+
+    def poll_key(self, delay_ms=1):
+        return self.display.poll_key(delay_ms)
+
+    def close(self):
+        self.display.close()
+
+
+def run_station(station, source, cores, threads):
+    """Un puesto completo: se ejecuta dentro del proceso del pool."""
+    _limit_threads(cores, threads)
+
+    import cv2
+    import app
+    from camera import VideoFileSource
+    from display import WindowDisplay, WINDOW_TITLE
+
+    cv2.setNumThreads(threads)
+    # cada puesto guarda sus perfiles, grabaciones y métricas en su propio directorio
+    config.profile_dir = os.path.join(config.profile_dir, f"puesto_{station}")
+    config.recordings_dir = os.path.join(config.recordings_dir, f"puesto_{station}")
+    config.analytics_dir = os.path.join(config.analytics_dir, f"puesto_{station}")
+
+    window = WindowDisplay(f"{WINDOW_TITLE} - puesto {station}")
+    if isinstance(source, int):
+        config.camera_index = source
+        cap = app.open_camera(source, window)
+    else:
+        cap = VideoFileSource(source)
+    display = StationReporter(station, window, app.profiler, cap, _stats_queue)
+    try:
+        app.main(cap, display)
+    except (SystemExit, KeyboardInterrupt):
+        pass    # ESC en un menú cierra solo este puesto; Ctrl+C llega a todos a la vez
+    finally:
+        cap.release()
+    return station
+
+
+# ================================================================
+# ------------------ SUPERVISOR ----------------------------------
+# ================================================================
+def print_stats(message, source):
+    def ms(key):
+        value = message[key]
+        return f"{value:6.1f}" if value is not None else "     -"
+    print(f"puesto {message['station']} ({source}): {message['fps']:5.1f} fps  "
+          f"frame p50 {ms('frame_p50_ms')} p95 {ms('frame_p95_ms')} ms  "
+          f"inferencia p50 {ms('inference_p50_ms')} p95 {ms('inference_p95_ms')} ms  "
+          f"descartados {message['dropped']}")
+
+
+def run_stations(sources, cores=None, threads=None):
+    """Lanza un proceso por fuente y muestra sus estadísticas hasta que terminan todos."""
+    groups = cores or split_cores(available_cores(), len(sources))
+    if len(groups) < len(sources):
+        raise ValueError(f"{len(sources)} puestos y solo {len(groups)} grupos de núcleos")
+
+    ctx = multiprocessing.get_context("spawn")
+    stats_queue = ctx.Queue(maxsize=64 * len(sources))
+    with ProcessPoolExecutor(max_workers=len(sources), mp_context=ctx,
+                             initializer=_init_worker, initargs=(stats_queue,)) as pool:
+        pending = set()
+        for i, source in enumerate(sources):
+            n = threads or len(groups[i])
+            print(f"puesto {i}: fuente {source}, núcleos {groups[i]}, {n} hilos")
+            pending.add(pool.submit(run_station, i, source, groups[i], n))
+
+        try:
+            while pending:
+                try:
+                    message = stats_queue.get(timeout=REPORT_INTERVAL_S)
+                    print_stats(message, sources[message["station"]])
+                except queue.Empty:
+                    pass
+                done, pending = wait(pending, timeout=0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        print(f"puesto {future.result()} terminado")
+                    except Exception as e:
+                        print(f"un puesto terminó con error: {e!r}")
+        except KeyboardInterrupt:
+            # Ctrl+C también llega a los puestos, que terminan solos; aquí solo se espera
+            print("Cerrando puestos...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", action="append", required=True,
+                        help="índice de cámara o ruta de vídeo; una vez por puesto")
+    parser.add_argument("--cores", action="append",
+                        help="núcleos de cada puesto, p. ej. 0-3 (una vez por puesto; por defecto se reparten)")
+    parser.add_argument("--threads", type=int, help="hilos de inferencia por puesto (por defecto sus núcleos)")
+    args = parser.parse_args()
+
+    sources = [parse_source(s) for s in args.source]
+    cores = [parse_cores(c) for c in args.cores] if args.cores else None
+    if cores is not None and len(cores) != len(sources):
+        parser.error("--cores tiene que darse una vez por cada --source")
+    run_stations(sources, cores, args.threads)
+
+
+if __name__ == "__main__":
+    main()
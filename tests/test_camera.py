@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+from camera import negotiate_capture, fourcc_name, load_cached_profile, save_cached_profile
+
+
+PROFILES = [
+    {"name": "720p MJPG 60", "width": 1280, "height": 720, "fourcc": "MJPG", "fps": 60, "buffersize": 1},
+    {"name": "720p MJPG 30", "width": 1280, "height": 720, "fourcc": "MJPG", "fps": 30, "buffersize": 1},
+    {"name": "480p MJPG 60", "width": 640, "height": 480, "fourcc": "MJPG", "fps": 60, "buffersize": 1},
+    {"name": "480p YUYV 30", "width": 640, "height": 480, "fourcc": "YUYV", "fps": 30, "buffersize": 1},
+    {"name": "1080p YUYV 30", "width": 1920, "height": 1080, "fourcc": "YUYV", "fps": 30, "buffersize": 1},
+]
+
+
+class FakeCapture:
+    """Cámara simulada: MJPG da 30 fps a 720p y 60 a 480p; YUYV no pasa de 640x480.
+
+    El reloj avanza lo que tardaría en llegar cada frame, así que los fps
+    medidos no dependen de la máquina.
+    """
+
+    def __init__(self):
+        self.props = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480, cv2.CAP_PROP_FPS: 30,
+                      cv2.CAP_PROP_FOURCC: cv2.VideoWriter_fourcc(*"YUYV"), cv2.CAP_PROP_BUFFERSIZE: 4}
+        self.t = 0.0
+        self.reads = 0
+
+    def set(self, prop, value):
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.props[prop]
+
+    def read(self):
+        w = int(self.props[cv2.CAP_PROP_FRAME_WIDTH])
+        h = int(self.props[cv2.CAP_PROP_FRAME_HEIGHT])
+        fourcc = fourcc_name(self.props[cv2.CAP_PROP_FOURCC])
+        if fourcc == "YUYV" and w > 640:
+            w, h = 640, 480     # el driver acepta el tamaño pero entrega otro
+        if fourcc == "MJPG":
+            rate = 30 if w > 640 else 60
+        else:
+            rate = 30
+        self.t += 1.0 / min(self.props[cv2.CAP_PROP_FPS], rate)
+        self.reads += 1
+        return True, np.zeros((h, w, 3), dtype=np.uint8)
+
+    def clock(self):
+        return self.t
+
+
+def test_picks_fastest_profile_that_meets_min_resolution():
+    cam = FakeCapture()
+    chosen, results = negotiate_capture(cam, PROFILES, (640, 480), 15, clock=cam.clock)
+    assert chosen["name"] == "480p MJPG 60"
+    assert round(chosen["measured_fps"]) == 60
+    assert len(results) == len(PROFILES)
+    # el driver queda configurado con el elegido
+    assert (cam.get(cv2.CAP_PROP_FRAME_WIDTH), fourcc_name(cam.get(cv2.CAP_PROP_FOURCC))) == (640, "MJPG")
+
+
+def test_measured_frame_size_decides_min_resolution():
+    cam = FakeCapture()
+    chosen, results = negotiate_capture(cam, PROFILES, (1280, 720), 15, clock=cam.clock)
+    # a igualdad de fps gana el primero; 1080p YUYV llega a 640x480 y no cuenta
+    assert chosen["name"] == "720p MJPG 60"
+    assert not results[-1]["meets_min"]
+    assert results[-1]["frame_size"] == (640, 480)
+
+
+def test_without_probe_takes_first_accepted_profile():
+    cam = FakeCapture()
+    chosen, results = negotiate_capture(cam, PROFILES, (640, 480), 0)
+    assert chosen["name"] == "720p MJPG 60"
+    assert chosen["measured_fps"] is None
+    assert len(results) == 1
+    assert cam.reads == 0
+
+
+def test_probe_frames_are_passed_to_on_frame():
+    cam = FakeCapture()
+    seen = []
+    negotiate_capture(cam, PROFILES[:2], (640, 480), 5, clock=cam.clock, on_frame=seen.append)
+    assert len(seen) == cam.reads == 2 * (3 + 5)
+
+
+def test_cached_profile_round_trip(tmp_path):
+    path = str(tmp_path / "camera_cache.json")
+    assert load_cached_profile(path, 0, PROFILES) is None
+
+    cam = FakeCapture()
+    chosen, _ = negotiate_capture(cam, PROFILES, (640, 480), 15, clock=cam.clock)
+    save_cached_profile(path, 0, chosen)
+    save_cached_profile(path, 1, {"name": "ya no existe", "measured_fps": 30.0})
+
+    profile, measured_fps = load_cached_profile(path, 0, PROFILES)
+    assert profile is PROFILES[2]
+    assert round(measured_fps) == 60
+    assert load_cached_profile(path, 1, PROFILES) is None
@@ -0,0 +1,156 @@
+import numpy as np
+
+
+# ================================================================
+# ------------------ PREDICCIÓN DE LANDMARKS ---------------------
+# ================================================================
+
+
+class ConstantVelocityPredictor:
+    """Extrapola posiciones suponiendo velocidad constante entre observaciones.
+
+    Trabaja con arrays de forma (personas, puntos, 2) en coordenadas
+    normalizadas y tiempos en milisegundos.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._pos = None
+        self._vel = None
+        self._t = None
+
+    @property
+    def ready(self):
+        return self._pos is not None
+
+    def update(self, pos, t_ms):
+        pos = np.asarray(pos, dtype=np.float32)
+        if self._pos is None or self._pos.shape != pos.shape or t_ms <= self._t:
+            self._vel = np.zeros_like(pos)
+        else:
+            self._vel = (pos - self._pos) / (t_ms - self._t)
+        self._pos = pos
+        self._t = t_ms
+
+    def predict(self, t_ms):
+        return self._pos + self._vel * (t_ms - self._t)
+
+
+class OneEuroFilter:
+    """Filtro One Euro vectorizado: suaviza el temblor y sigue rápido los movimientos.
+
+    La frecuencia de corte crece con la velocidad (``min_cutoff + beta * |v|``,
+    en Hz con la velocidad en unidades normalizadas por segundo). La velocidad
+    filtrada se usa para predecir hacia adelante.
+    """
+
+    def __init__(self, min_cutoff=1.5, beta=5.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._dx = None
+        self._t = None
+
+    @property
+    def ready(self):
+        return self._x is not None
+
+    @staticmethod
+    def _alpha(dt, cutoff):
+        tau = 1.0 / (2.0 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, pos, t_ms):
+        pos = np.asarray(pos, dtype=np.float32)
+        if self._x is None or self._x.shape != pos.shape or t_ms <= self._t:
+            self._x = pos
+            self._dx = np.zeros_like(pos)
+            self._t = t_ms
+            return
+
+        dt = (t_ms - self._t) / 1000.0
+        a_d = self._alpha(dt, self.d_cutoff)
+        self._dx = a_d * (pos - self._x) / dt + (1.0 - a_d) * self._dx
+
+        a = self._alpha(dt, self.min_cutoff + self.beta * np.abs(self._dx))
+        self._x = a * pos + (1.0 - a) * self._x
+        self._t = t_ms
+
+    def predict(self, t_ms):
+        return self._x + self._dx * ((t_ms - self._t) / 1000.0)
+
+
+class KalmanFilterCV:
+    """Filtro de Kalman de velocidad constante, independiente por coordenada.
+
+    ``process_noise`` es la densidad espectral de la aceleración y
+    ``measurement_noise`` la desviación típica del landmark medido, ambos en
+    unidades normalizadas (por segundo cuando aplica).
+    """
+
+    def __init__(self, process_noise=10.0, measurement_noise=0.005):
+        self.q = process_noise
+        self.r = measurement_noise ** 2
+        self.reset()
+
+    def reset(self):
+        self._pos = None
+        self._t = None
+
+    @property
+    def ready(self):
+        return self._pos is not None
+
+    def update(self, pos, t_ms):
+        z = np.asarray(pos, dtype=np.float32)
+        if self._pos is None or self._pos.shape != z.shape or t_ms <= self._t:
+            self._pos = z.copy()
+            self._vel = np.zeros_like(z)
+            self._p00 = np.full_like(z, self.r)
+            self._p01 = np.zeros_like(z)
+            self._p11 = np.full_like(z, 1.0)
+            self._t = t_ms
+            return
+
+        dt = (t_ms - self._t) / 1000.0
+        q = self.q
+
+        # predicción
+        self._pos = self._pos + self._vel * dt
+        p00 = self._p00 + dt * (2.0 * self._p01 + dt * self._p11) + q * dt ** 3 / 3.0
+        p01 = self._p01 + dt * self._p11 + q * dt ** 2 / 2.0
+        p11 = self._p11 + q * dt
+
+        # corrección
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        y = z - self._pos
+        self._pos = self._pos + k0 * y
+        self._vel = self._vel + k1 * y
+        self._p00 = (1.0 - k0) * p00
+        self._p01 = (1.0 - k0) * p01
+        self._p11 = p11 - k1 * p01
+        self._t = t_ms
+
+    def predict(self, t_ms):
+        return self._pos + self._vel * ((t_ms - self._t) / 1000.0)
+
+
+def create_landmark_filter(config):
+    """Filtro indicado en ``config.landmark_filter`` ("none", "one_euro" o "kalman").
+
+    Con "none" se usa solo el predictor de velocidad constante para rellenar
+    los frames sin inferencia.
+    """
+    if config.landmark_filter == "one_euro":
+        return OneEuroFilter(config.one_euro_min_cutoff, config.one_euro_beta)
+    if config.landmark_filter == "kalman":
+        return KalmanFilterCV(config.kalman_process_noise, config.kalman_measurement_noise)
+    return ConstantVelocityPredictor()
@@ -0,0 +1,134 @@
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+
+# ================================================================
+# ------------------ GRABACIÓN DE VÍDEO --------------------------
+# ================================================================
+class VideoRecorder:
+    """Graba en un vídeo los frames que muestra el juego sin frenar el loop.
+
+    ``write`` copia el frame (reducido a ``scale`` en la misma pasada) en uno
+    de los ``queue_size`` buffers libres y lo encola; un hilo aparte lo
+    codifica con ``cv2.VideoWriter`` y devuelve el buffer. Si el codificador
+    va atrasado y no queda ningún buffer libre, el frame se descarta en vez
+    de esperar (``dropped`` cuenta cuántos). El hilo corre con prioridad
+    baja (``nice``) para que, con pocos núcleos, el juego vaya primero.
+
+    El vídeo va siempre a ``fps``: con el instante de captura de cada frame
+    (``t``, en segundos) cada uno se escribe tantas veces como frames del
+    vídeo caen hasta el siguiente, así que dura lo mismo que la partida
+    aunque el juego vaya más lento que la cámara o se descarten frames
+    (``repeated`` cuenta las repeticiones y ``skipped`` los frames que
+    llegan antes de que toque el siguiente del vídeo). Sin ``t`` se escribe
+    cada frame una vez.
+
+    El tamaño del vídeo se fija con el primer frame.
+    """
+
+    def __init__(self, path, fps=30.0, scale=1.0, queue_size=8, fourcc="mp4v", nice=19):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.fps = fps
+        self.scale = scale
+        self.fourcc = fourcc
+        self.nice = nice
+        self.frames = 0
+        self.dropped = 0
+        self.repeated = 0
+        self.skipped = 0
+        self.size = None
+        self._start = None
+        self._last_t = None
+        self._queued = 0            # frames del vídeo ya encolados (contando repeticiones)
+        self._queue_size = queue_size
+        self._free = queue.SimpleQueue()
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._thread = threading.Thread(target=self._encode_loop, name="VideoRecorder", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, t=None):
+        """Encola una copia de ``frame``, capturado en ``t``. Devuelve False si no entra en el vídeo."""
+        count = 1
+        if t is not None:
+            if self._start is None:
+                self._start = t
+            self._last_t = t
+            # frames del vídeo hasta el instante de este (incluido) que aún no se han encolado
+            count = int((t - self._start) * self.fps + 0.5) + 1 - self._queued
+            if count <= 0:
+                self.skipped += 1
+                return False
+        if self.size is None:
+            h, w = frame.shape[:2]
+            self.size = (int(w * self.scale), int(h * self.scale))
+            for _ in range(self._queue_size):
+                self._free.put(np.empty((self.size[1], self.size[0], 3), dtype=np.uint8))
+        try:
+            buf = self._free.get_nowait()
+        except queue.Empty:
+            # no se avanza _queued: el siguiente frame que entre cubre también este hueco
+            self.dropped += 1
+            return False
+        if buf.shape == frame.shape:
+            np.copyto(buf, frame)
+        else:
+            cv2.resize(frame, self.size, dst=buf, interpolation=cv2.INTER_AREA)
+        self._queue.put((buf, count))
+        self._queued += count
+        return True
+
+    def _pending_frames(self):
+        """Frames del vídeo que faltan hasta el último instante visto (por los descartados del final)."""
+        if self._last_t is None:
+            return 0
+        return max(0, int((self._last_t - self._start) * self.fps + 0.5) + 1 - self._queued)
+
+    def _encode_loop(self):
+        # en Linux la prioridad es de cada hilo: solo baja la del codificador
+        if self.nice and hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            except OSError:
+                pass
+        last = None
+        while True:
+            buf, count = self._queue.get()
+            closing = buf is None
+            if closing:
+                # al cerrar, el último frame escrito cubre lo que se descartó al final
+                buf = last
+                if buf is None or count == 0:
+                    break
+            if self._writer is None:
+                self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc),
+                                               self.fps, self.size)
+                if not self._writer.isOpened():
+                    print(f"No se pudo abrir {self.path} para grabar vídeo ({self.fourcc})")
+            if self._writer.isOpened():
+                for _ in range(count):
+                    self._writer.write(buf)
+                self.frames += count
+                self.repeated += count - 1
+            if closing:
+                break
+            last = buf
+            self._free.put(buf)
+
+    def close(self):
+        """Codifica lo que quede en la cola y cierra el fichero."""
+        self._queue.put((None, self._pending_frames()))
+        self._thread.join()
+        if self._writer is not None:
+            self._writer.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
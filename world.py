@@ -0,0 +1,187 @@
+import numpy as np
+
+
+# ================================================================
+# ------------------ POOL DE OBJETOS QUE CAEN --------------------
+# ================================================================
+class ObjectPool:
+    """Almacén de capacidad fija con los objetos que caen en arrays NumPy.
+
+    Cada objeto ocupa un hueco (slot) de los arrays ``x``, ``y``, ``speed``,
+    ``type`` y ``radius``. Mover, eliminar los que salen de pantalla y
+    comprobar colisiones se hace en una sola pasada vectorizada, y los huecos
+    liberados se reutilizan en vez de crear objetos nuevos. Las colisiones
+    pasan por una ``SpatialHash`` para no comparar cada objeto con cada
+    extremidad de cada jugador.
+    """
+
+    def __init__(self, sprites, capacity=128):
+        self.capacity = capacity
+        self.type_names = list(sprites)
+        self.type_index = {name: i for i, name in enumerate(self.type_names)}
+        self._sprites = [sprites[name] for name in self.type_names]
+        self._type_radius = np.array(
+            [int(max(s.height, s.width) / 2) - 5 for s in self._sprites], dtype=np.float32)
+
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.prev_y = np.zeros(capacity, dtype=np.float32)   # y en la última llamada a collide
+        self.speed = np.zeros(capacity, dtype=np.float32)
+        self.type = np.zeros(capacity, dtype=np.int8)
+        self.radius = np.zeros(capacity, dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._step = np.zeros(capacity, dtype=np.float32)
+        # celdas del tamaño del objeto más grande
+        self._grid = SpatialHash(float(self._type_radius.max()))
+
+        # pila de huecos libres; se sacan en orden 0, 1, 2...
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self):
+        return self.capacity - len(self._free)
+
+    def clear(self):
+        self.alive[:] = False
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def spawn(self, obj_type, x, speed):
+        """Ocupa un hueco libre. Devuelve el slot o -1 si el pool está lleno."""
+        if not self._free:
+            return -1
+        slot = self._free.pop()
+        t = self.type_index[obj_type]
+        self.x[slot] = x
+        self.y[slot] = 0
+        self.prev_y[slot] = 0
+        self.speed[slot] = speed
+        self.type[slot] = t
+        self.radius[slot] = self._type_radius[t]
+        self.alive[slot] = True
+        return slot
+
+    def release(self, slots):
+        slots = np.asarray(slots)
+        if slots.size == 0:
+            return
+        self.alive[slots] = False
+        self._free.extend(slots.tolist())
+
+    def move(self, dt):
+        """Avanza ``dt`` segundos; ``speed`` está en píxeles por segundo."""
+        np.multiply(self.speed, dt, out=self._step)
+        np.add(self.y, self._step, out=self.y, where=self.alive)
+
+    def cull(self, height):
+        """Libera los objetos que han salido por abajo y devuelve sus slots."""
+        gone = np.flatnonzero(self.alive & (self.y > height))
+        self.release(gone)
+        return gone
+
+    def collide(self, points, types, previous=None):
+        """Objetos tocados por algún punto de extremidad entre este frame y el anterior.
+
+        ``points`` es un array (n, 2) de puntos en píxeles, ``types`` el tipo
+        de objeto que puede atrapar cada punto y ``previous`` dónde estaba
+        cada punto en el frame anterior (None si no se sabe). La prueba es
+        continua: se busca la distancia mínima entre el objeto y el punto
+        moviéndose los dos en línea recta desde su posición anterior, así que
+        un objeto rápido o una mano rápida no se cruzan sin tocarse aunque
+        caigan a lados distintos entre dos frames. Solo se comparan los pares que la rejilla deja cerca. Si
+        varios puntos tocan el mismo objeto se lo lleva el más cercano.
+        Devuelve (slots, índice en ``points`` del punto que atrapó cada
+        slot), ordenados por slot.
+        """
+        alive = np.flatnonzero(self.alive)
+        empty = np.empty(0, dtype=np.intp)
+        if len(points) == 0 or len(alive) == 0:
+            np.copyto(self.prev_y, self.y)
+            return empty, empty
+
+        p1 = np.asarray(points, dtype=np.float32)
+        p0 = p1 if previous is None else np.asarray(previous, dtype=np.float32)
+        # lo que más ha caído un objeto desde la última prueba amplía la búsqueda
+        travel = float(np.max(self.y[alive] - self.prev_y[alive]))
+        pad = self._grid.cell_size + max(0.0, travel)
+        self._grid.build(self.x[alive], self.y[alive], alive)
+        slots, which = self._grid.query(np.minimum(p0[:, 0], p1[:, 0]) - pad,
+                                        np.minimum(p0[:, 1], p1[:, 1]) - pad,
+                                        np.maximum(p0[:, 0], p1[:, 0]) + pad,
+                                        np.maximum(p0[:, 1], p1[:, 1]) + pad)
+
+        # posición relativa objeto - punto al principio (d) y su cambio en el intervalo (v)
+        dx = self.x[slots] - p0[which, 0]
+        dy = self.prev_y[slots] - p0[which, 1]
+        vx = p0[which, 0] - p1[which, 0]
+        vy = (self.y[slots] - self.prev_y[slots]) - (p1[which, 1] - p0[which, 1])
+        vv = vx * vx + vy * vy
+        t = np.clip(-(dx * vx + dy * vy) / np.where(vv > 0, vv, 1), 0, 1)
+        dx += t * vx
+        dy += t * vy
+        d2 = dx * dx + dy * dy
+        np.copyto(self.prev_y, self.y)
+
+        hit = (d2 < self.radius[slots] ** 2) & (self.type[slots] == np.asarray(types)[which])
+        if not hit.any():
+            return empty, empty
+        slots, which, d2 = slots[hit], which[hit], d2[hit]
+
+        order = np.lexsort((d2, slots))
+        slots, which = slots[order], which[order]
+        first = np.ones(len(slots), dtype=bool)
+        first[1:] = slots[1:] != slots[:-1]
+        return slots[first], which[first]
+
+    def draw(self, frame):
+        for slot in np.flatnonzero(self.alive):
+            self._sprites[self.type[slot]].draw(frame, self.x[slot], self.y[slot])
+
+
+# ================================================================
+# ------------------ REJILLA ESPACIAL ----------------------------
+# ================================================================
+class SpatialHash:
+    """Rejilla uniforme para encontrar los objetos que caen dentro de unas cajas.
+
+    Se reconstruye en cada frame con ``build``: los objetos se ordenan por
+    la clave de su celda, que recorre cada columna de la rejilla de arriba
+    abajo, así que las celdas de una columna que cubre una caja quedan como
+    un tramo contiguo. ``query`` busca con ``searchsorted`` un tramo por
+    columna y devuelve solo esos pares candidatos, de modo que el coste crece
+    con los pares cercanos y no con objetos × cajas.
+    """
+
+    _ROW = 1 << 16      # celdas por columna en la clave; de sobra para cualquier pantalla
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self._keys = np.empty(0, dtype=np.int64)
+        self._items = np.empty(0, dtype=np.intp)
+
+    def _cell(self, v):
+        return np.floor_divide(v, self.cell_size).astype(np.int64)
+
+    def build(self, x, y, items):
+        """Indexa los ``items`` (p. ej. slots) situados en (``x``, ``y``)."""
+        keys = self._cell(x) * self._ROW + self._cell(y) + self._ROW // 2
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._items = np.asarray(items)[order]
+
+    def query(self, x0, y0, x1, y1):
+        """Pares candidatos (item, índice de caja) con el item en las celdas de cada caja."""
+        cx0, cx1 = self._cell(x0), self._cell(x1)
+        cy0, cy1 = self._cell(y0) + self._ROW // 2, self._cell(y1) + self._ROW // 2
+        ncols = cx1 - cx0 + 1
+        box = np.repeat(np.arange(len(ncols)), ncols)
+        col = np.arange(int(ncols.sum())) - np.repeat(np.cumsum(ncols) - ncols, ncols) + cx0[box]
+        lo = np.searchsorted(self._keys, col * self._ROW + cy0[box], side="left")
+        hi = np.searchsorted(self._keys, col * self._ROW + cy1[box], side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        # posiciones lo..hi-1 de cada tramo, concatenadas
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        positions = starts + np.arange(total)
+        return self._items[positions], np.repeat(box, counts)